@@ -0,0 +1,146 @@
+"""
+Estatísticas agregadas de todos os canais mantidas incrementalmente
+Somas por usuário e rankings seguem cada alteração de pontos/mensagens dos
+bots; os totais vêm dos PointsLedger (banco + pendentes), então ler as
+estatísticas custa O(canais) (+ O(K) para os rankings)
+"""
+
+import threading
+from typing import Dict
+
+from app.core.leaderboard import Leaderboard
+
+
+class AggregateStats:
+    """Somas por usuário (carregados em memória) e totais de todos os bots
+
+    As somas por usuário e os rankings cobrem só os usuários em memória; os
+    totais cobrem o canal inteiro. total_users soma os usuários de cada
+    canal (quem está em dois canais conta duas vezes).
+    """
+
+    def __init__(self):
+        self.points: Dict[str, int] = {}
+        self.messages: Dict[str, int] = {}
+        self.points_ranking = Leaderboard()
+        self.messages_ranking = Leaderboard()
+        self._presence: Dict[str, int] = {}  # Em quantos canais o usuário existe
+        self._attached: Dict[str, object] = {}
+        self._changed = set()  # Usuários alterados desde o último take_changes
+        self._lock = threading.Lock()
+
+    def totals(self) -> dict:
+        """Totais de usuários, pontos e mensagens somados por canal"""
+        totals = {"total_users": 0, "total_points": 0, "total_messages": 0}
+        with self._lock:
+            bots = list(self._attached.values())
+        for bot in bots:
+            for key, value in bot.ledger.totals().items():
+                totals[key] += value
+        return totals
+
+    def attach(self, channel: str, bot):
+        """Soma o estado atual do bot e passa a acompanhar suas alterações"""
+        with self._lock:
+            if channel in self._attached:
+                return
+            self._attached[channel] = bot
+
+            for user in bot.users.names:
+                self._add_presence(user, 1)
+            for user, pts in bot.user_points.items():
+                self._add(self.points, self.points_ranking, user, pts)
+            for user, msgs in bot.message_count.items():
+                self._add(self.messages, self.messages_ranking, user, msgs)
+
+            bot.users.on_new_user.append(self._on_new_user)
+            bot.user_points.listeners.append(self._on_points)
+            bot.message_count.listeners.append(self._on_messages)
+
+    def detach(self, channel: str):
+        """Para de acompanhar o bot e subtrai o estado dele dos agregados"""
+        with self._lock:
+            bot = self._attached.pop(channel, None)
+            if bot is None:
+                return
+
+            bot.users.on_new_user.remove(self._on_new_user)
+            bot.user_points.listeners.remove(self._on_points)
+            bot.message_count.listeners.remove(self._on_messages)
+
+            for user, pts in bot.user_points.items():
+                self._add(self.points, self.points_ranking, user, -pts)
+            for user, msgs in bot.message_count.items():
+                self._add(self.messages, self.messages_ranking, user, -msgs)
+            for user in bot.users.names:
+                self._add_presence(user, -1)
+
+    def snapshot(self, top: int = 10) -> dict:
+        """Totais e rankings top-K de todos os canais"""
+        return {
+            **self.totals(),
+            "top_points": [
+                {"username": user, "points": pts}
+                for user, pts in self.points_ranking.top(top)
+            ],
+            "top_messages": [
+                {"username": user, "messages": msgs}
+                for user, msgs in self.messages_ranking.top(top)
+            ],
+        }
+
+    def take_changes(self) -> set:
+        """Retorna e limpa o conjunto de usuários alterados (para deltas)"""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            return changed
+
+    def sums_for(self, users) -> Dict[str, list]:
+        """[pontos, mensagens] dos usuários pedidos que ainda existem"""
+        with self._lock:
+            return {
+                user: [self.points.get(user, 0), self.messages.get(user, 0)]
+                for user in users
+                if user in self._presence
+            }
+
+    def user_sums(self) -> tuple:
+        """Cópias dos dicts (pontos, mensagens) por usuário — O(usuários)"""
+        with self._lock:
+            return dict(self.points), dict(self.messages)
+
+    # ===== LISTENERS (chamados nas threads dos bots) =====
+
+    def _on_new_user(self, user: str):
+        with self._lock:
+            self._add_presence(user, 1)
+
+    def _on_points(self, user: str, old: int, new: int):
+        with self._lock:
+            self._add(self.points, self.points_ranking, user, new - old)
+
+    def _on_messages(self, user: str, old: int, new: int):
+        with self._lock:
+            self._add(self.messages, self.messages_ranking, user, new - old)
+
+    # ===== AUXILIARES =====
+
+    def _add_presence(self, user: str, delta: int):
+        self._changed.add(user)
+        count = self._presence.get(user, 0) + delta
+        if count > 0:
+            self._presence[user] = count
+        else:
+            self._presence.pop(user, None)
+            self.points.pop(user, None)
+            self.messages.pop(user, None)
+            self.points_ranking.update(user, None)
+            self.messages_ranking.update(user, None)
+
+    def _add(self, sums: Dict[str, int], ranking: Leaderboard, user: str, delta: int):
+        if not delta and user in sums:
+            return
+        self._changed.add(user)
+        value = sums.get(user, 0) + delta
+        sums[user] = value
+        ranking.update(user, value)
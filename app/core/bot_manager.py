@@ -5,20 +5,50 @@ Solução: Usar socketio com async_mode='threading'
 """
 
 import asyncio
+import concurrent.futures
+import os
 import threading
-from collections import defaultdict
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from app.core.aggregate_stats import AggregateStats
+from app.core.event_bus import EventBus
+from app.core.send_governor import PRIORITY_MANUAL
+from app.core.trigger_matcher import TriggerMatcher
 from app.core.twitch_bot_class import TwitchBot
 
+# Canal que recebe pontos importados sem canal quando nenhum bot está ativo
+IMPORT_DEFAULT_CHANNEL = "global"
+# Espera (segundos) pela resposta da fila de envio do canal no envio manual
+SEND_TIMEOUT = 2.0
+# Tempo máximo (segundos) para fechar todos os canais juntos no encerramento
+SHUTDOWN_TIMEOUT = float(os.getenv("BOT_SHUTDOWN_TIMEOUT", "10"))
+
 
 class BotManager:
     """Gerenciador central para múltiplos bots da Twitch"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        shared_loop: Optional[bool] = None,
+        pool_size: int = None,
+        persist_messages: Optional[bool] = None,
+        db_path: Optional[str] = None,
+    ):
         self.bots: Dict[str, TwitchBot] = {}
         self.bot_threads: Dict[str, threading.Thread] = {}
         self.bot_loops: Dict[str, asyncio.AbstractEventLoop] = {}
         self.connected_channels = set()
+        self.aggregates = AggregateStats()
+        self._shut_down = False
+
+        # Modo de loop compartilhado: uma thread, um loop e um pool fixo de
+        # conexões IRC (ChannelHub) hospedando todos os canais
+        if shared_loop is None:
+            shared_loop = os.getenv("BOT_SHARED_LOOP", "false").lower() == "true"
+        self.shared_loop = shared_loop
+        self.pool_size = max(1, pool_size or int(os.getenv("BOT_POOL_SIZE", "1")))
+        self.hubs: List = []
+        self._shared_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._shared_thread: Optional[threading.Thread] = None
 
         # Callbacks para eventos
         self.on_message_callback = None
@@ -26,16 +56,34 @@ class BotManager:
         self.on_log_callback = None
         self.on_raid_callback = None
 
-        # ✅ ADICIONAR: Lock para thread safety
-        self._callback_lock = threading.Lock()
+        # Eventos dos bots vão para o barramento; cada consumidor tem sua
+        # fila e sua thread, então um callback lento não trava os bots.
+        # Outros consumidores (banco, integrações) usam events.subscribe()
+        self.events = EventBus()
+        self.events.subscribe("callbacks", self._dispatch_callback)
 
         # Inicializar banco de dados
+        from app.database.async_db import AsyncBotDatabase
         from app.database.crud import BotDatabase
 
-        self.db = BotDatabase()
+        self.db = BotDatabase(db_path) if db_path else BotDatabase()
+        # Versão awaitable para os bots: o loop do canal nunca espera o disco
+        self.async_db = AsyncBotDatabase(self.db)
+
+        # Histórico do chat e raids: consumidor próprio no barramento -> banco
+        if persist_messages is None:
+            persist_messages = (
+                os.getenv("DB_PERSIST_MESSAGES", "true").lower() == "true"
+            )
+        if persist_messages:
+            self.events.subscribe(
+                "database", self._persist_event, kinds=("message", "raid")
+            )
 
         # Carregar auto-respostas do banco de dados
         self.auto_responses = self._load_auto_responses()
+        # Um autômato só para todos os bots, recompilado a cada alteração
+        self.trigger_matcher = TriggerMatcher(self.auto_responses)
 
     def set_callbacks(self, on_message=None, on_status=None, on_log=None, on_raid=None):
         """Define callbacks para eventos"""
@@ -55,6 +103,16 @@ class BotManager:
         # Criar bot config
         bot_config = {"token": token, "channel": channel, "prefix": prefix}
 
+        if self.shared_loop:
+            loop = self._ensure_shared_loop()
+            self.bot_loops[channel] = loop
+            self.connected_channels.add(channel)
+            asyncio.run_coroutine_threadsafe(
+                self._attach_channel(channel, bot_config), loop
+            )
+            self.events.publish("status", channel, "connecting")
+            return True
+
         # Criar thread para este canal
         thread = threading.Thread(
             target=self._run_bot_for_channel, args=(channel, bot_config), daemon=True
@@ -64,8 +122,7 @@ class BotManager:
         self.bot_threads[channel] = thread
         self.connected_channels.add(channel)
 
-        if self.on_status_change_callback:
-            self._safe_callback(self.on_status_change_callback, channel, "connecting")
+        self.events.publish("status", channel, "connecting")
 
         return True
 
@@ -77,12 +134,13 @@ class BotManager:
 
         self._log("info", f"Desconectando do canal {channel}...")
 
-        # Salvar dados antes de desconectar
+        if self.shared_loop:
+            return self._disconnect_shared(channel)
+
+        # Fechar o bot (o close grava os pontos pendentes no banco)
         if channel in self.bots:
             bot_instance = self.bots[channel]
             if bot_instance:
-                bot_instance.save_data()
-
                 # Fechar bot usando asyncio de forma correta
                 if channel in self.bot_loops:
                     loop = self.bot_loops[channel]
@@ -95,25 +153,23 @@ class BotManager:
 
                         time.sleep(0.5)
 
-            # Remover bot
-            del self.bots[channel]
+        return self._release_channel(channel)
 
-        # Remover thread e loop
-        if channel in self.bot_threads:
-            del self.bot_threads[channel]
+    def _release_channel(self, channel: str) -> bool:
+        """Esquece o bot, a thread e o loop do canal já fechado e avisa offline"""
+        self._forget_bot(channel)
+        self.bot_threads.pop(channel, None)
 
-        if channel in self.bot_loops:
-            loop = self.bot_loops[channel]
-            if loop and not loop.is_closed():
-                # Parar o loop de forma segura
-                loop.call_soon_threadsafe(loop.stop)
-            del self.bot_loops[channel]
+        loop = self.bot_loops.pop(channel, None)
+        # O loop compartilhado continua rodando os outros canais
+        if loop and not self.shared_loop and not loop.is_closed():
+            # Parar o loop de forma segura
+            loop.call_soon_threadsafe(loop.stop)
 
         # Remover dos canais conectados
         self.connected_channels.discard(channel)
 
-        if self.on_status_change_callback:
-            self._safe_callback(self.on_status_change_callback, channel, "offline")
+        self.events.publish("status", channel, "offline")
 
         self._log("success", f"Desconectado do canal {channel}")
         return True
@@ -125,41 +181,146 @@ class BotManager:
         self.bot_loops[channel] = loop
 
         try:
-            # Wrapper GUI para callbacks
-            gui_wrapper = GUIWrapper(
-                channel=channel,
-                on_message=self.on_message_callback,
-                on_log=self.on_log_callback,
-                on_raid=self.on_raid_callback,
-                callback_lock=self._callback_lock,  # ✅ Passar lock
-            )
-
-            bot_instance = TwitchBot(
-                token=bot_config["token"],
-                prefix=bot_config.get("prefix", "$"),
-                channels=[channel],
-                gui=gui_wrapper,
-            )
-
-            # Carregar auto-respostas centralizadas
-            bot_instance.auto_responses.update(self.auto_responses)
+            bot_instance = self._create_bot(channel, bot_config)
 
             # Armazenar instância do bot
             self.bots[channel] = bot_instance
 
             # Notificar status
-            if self.on_status_change_callback:
-                self._safe_callback(self.on_status_change_callback, channel, "online")
+            self.events.publish("status", channel, "online")
 
             loop.run_until_complete(bot_instance.start())
         except Exception as e:
             self._log("error", f"Erro no canal {channel}: {str(e)}")
+            self._forget_bot(channel)
             self.connected_channels.discard(channel)
-            if self.on_status_change_callback:
-                self._safe_callback(self.on_status_change_callback, channel, "error")
+            self.events.publish("status", channel, "error")
         finally:
             loop.close()
 
+    def _create_bot(self, channel: str, bot_config: dict) -> TwitchBot:
+        """Cria o TwitchBot de um canal (deve rodar dentro do loop dele)"""
+        # Wrapper GUI para callbacks
+        gui_wrapper = GUIWrapper(channel=channel, events=self.events)
+
+        bot_instance = TwitchBot(
+            token=bot_config["token"],
+            prefix=bot_config.get("prefix", "$"),
+            channels=[channel],
+            gui=gui_wrapper,
+        )
+        bot_instance.attach_db(self.async_db)
+
+        # Auto-respostas centralizadas: o auto_responses.json (mesma pasta
+        # para todos os bots) entra no gerenciador, e o bot usa o dict e o
+        # matcher compartilhados
+        added = False
+        for trigger, response in bot_instance.auto_responses.items():
+            if trigger not in self.auto_responses:
+                self.auto_responses[trigger] = response
+                added = True
+        if added:
+            self.trigger_matcher.compile(self.auto_responses)
+        bot_instance.auto_responses = self.auto_responses
+        bot_instance.trigger_matcher = self.trigger_matcher
+
+        # Passar a somar o canal nas estatísticas agregadas
+        self.aggregates.attach(channel, bot_instance)
+        return bot_instance
+
+    def _forget_bot(self, channel: str):
+        """Remove o bot do canal e tira seus números dos agregados"""
+        self.aggregates.detach(channel)
+        self.bots.pop(channel, None)
+
+    # ===== MODO LOOP COMPARTILHADO =====
+
+    def _ensure_shared_loop(self) -> asyncio.AbstractEventLoop:
+        """Inicia (uma vez) a thread única que roda o loop compartilhado"""
+        if self._shared_loop and not self._shared_loop.is_closed():
+            return self._shared_loop
+
+        loop = asyncio.new_event_loop()
+
+        def run_loop():
+            asyncio.set_event_loop(loop)
+            loop.run_forever()
+
+        self._shared_thread = threading.Thread(target=run_loop, daemon=True)
+        self._shared_thread.start()
+        self._shared_loop = loop
+        return loop
+
+    async def _attach_channel(self, channel: str, bot_config: dict):
+        """Cria o bot do canal e o roteia para um ChannelHub do pool"""
+        from app.core.channel_hub import ChannelHub
+
+        try:
+            bot_instance = self._create_bot(channel, bot_config)
+            self.bots[channel] = bot_instance
+
+            # Pool fixo: cria hubs até pool_size, depois usa o menos ocupado
+            if len(self.hubs) < self.pool_size:
+                hub = ChannelHub(
+                    token=bot_config["token"],
+                    prefix=bot_config.get("prefix", "$"),
+                    channels=[channel],
+                )
+                self.hubs.append(hub)
+                await hub.add_route(bot_instance)
+                self._shared_loop.create_task(self._run_hub(hub))
+            else:
+                hub = min(self.hubs, key=lambda h: h.channel_count)
+                await hub.add_route(bot_instance)
+
+            self.events.publish("status", channel, "online")
+        except Exception as e:
+            self._log("error", f"Erro no canal {channel}: {str(e)}")
+            self._forget_bot(channel)
+            self.bot_loops.pop(channel, None)
+            self.connected_channels.discard(channel)
+            self.events.publish("status", channel, "error")
+
+    async def _run_hub(self, hub):
+        """Mantém a conexão do hub; em erro marca todos os seus canais"""
+        try:
+            await hub.start()
+        except Exception as e:
+            for channel in list(hub.routes):
+                self._log("error", f"Erro no canal {channel}: {str(e)}")
+                self._forget_bot(channel)
+                self.bot_loops.pop(channel, None)
+                self.connected_channels.discard(channel)
+                self.events.publish("status", channel, "error")
+        finally:
+            if hub in self.hubs:
+                self.hubs.remove(hub)
+
+    async def _detach_channel(self, channel: str):
+        """Remove o canal do seu hub; fecha o hub se ficar vazio"""
+        for hub in list(self.hubs):
+            if channel.lower() in hub.routes:
+                await hub.remove_route(channel)
+                # Vários canais do hub podem sair juntos (shutdown): só um fecha
+                if hub.channel_count == 0 and hub in self.hubs:
+                    self.hubs.remove(hub)
+                    await hub.close()
+                return
+
+    def _disconnect_shared(self, channel: str) -> bool:
+        """Desconecta um canal no modo de loop compartilhado"""
+        loop = self._shared_loop
+        if loop and not loop.is_closed():
+            future = asyncio.run_coroutine_threadsafe(
+                self._detach_channel(channel), loop
+            )
+            try:
+                future.result(timeout=5)
+            except Exception as e:
+                self._log("warning", f"Erro ao fechar canal {channel}: {str(e)}")
+
+        return self._release_channel(channel)
+
     def send_message(self, channel: str, message: str) -> bool:
         """Envia mensagem para um canal específico"""
         if channel not in self.bots:
@@ -168,38 +329,58 @@ class BotManager:
 
         try:
             bot_instance = self.bots[channel]
-            ch = bot_instance.get_channel(channel)
+            ch = bot_instance.get_chat_channel()
 
             if ch is None:
                 self._log("warning", f"Canal '{channel}' não acessível")
                 return False
 
-            asyncio.run_coroutine_threadsafe(ch.send(message), bot_instance.loop)
+            # Envio manual tem prioridade sobre comandos e auto-respostas
+            governor = (bot_instance.hub or bot_instance).governor
+            queued = governor.submit_threadsafe(ch, message, PRIORITY_MANUAL).result(
+                timeout=SEND_TIMEOUT
+            )
+            if not queued:
+                self._log(
+                    "warning",
+                    f"[{channel}] Mensagem não enviada (já está na fila ou "
+                    f"fila cheia): {message}",
+                )
+                return False
 
             self._log("bot", f"[{channel}] Você: {message}")
             return True
+        except concurrent.futures.TimeoutError:
+            self._log("warning", f"[{channel}] Fila de envio não respondeu: {message}")
+            return False
         except Exception as e:
             self._log("error", f"Erro ao enviar mensagem: {str(e)}")
             return False
 
-    # ✅ NOVO MÉTODO: Executar callback de forma thread-safe
-    def _safe_callback(self, callback, *args, **kwargs):
-        """Executa callback de forma thread-safe"""
+    def _persist_event(self, kind: str, channel: str, *args):
+        """Mensagens vão para a gravação em lote; raids são gravadas na hora"""
+        if kind == "raid":
+            raider, viewers = args
+            self.db.analytics.record_raid(channel, raider, viewers)
+            return
+        username, message = args[:2]
+        if message:
+            self.db.message_sink.put(username, channel, message)
+
+    def _dispatch_callback(self, kind: str, *args):
+        """Entrega um evento do barramento ao callback correspondente"""
+        callback = {
+            "message": self.on_message_callback,
+            "status": self.on_status_change_callback,
+            "log": self.on_log_callback,
+            "raid": self.on_raid_callback,
+        }.get(kind)
         if callback:
-            with self._callback_lock:
-                try:
-                    callback(*args, **kwargs)
-                except Exception as e:
-                    print(f"❌ Erro no callback: {e}")
+            callback(*args)
 
     def add_auto_response(self, trigger: str, response: str) -> bool:
         """Adiciona resposta automática"""
-        self.auto_responses[trigger] = response
-
-        # Adicionar a todos os bots ativos
-        for bot in self.bots.values():
-            bot.auto_responses[trigger] = response
-            bot.save_data()
+        self._apply_auto_response(trigger, response)
 
         # Salvar no arquivo separado
         self._save_auto_responses()
@@ -210,19 +391,24 @@ class BotManager:
         if trigger not in self.auto_responses:
             return False
 
-        # Remover do gerenciador
-        del self.auto_responses[trigger]
-
-        # Remover de todos os bots ativos
-        for bot in self.bots.values():
-            if trigger in bot.auto_responses:
-                del bot.auto_responses[trigger]
-                bot.save_data()
+        self._discard_auto_response(trigger)
 
-        # Salvar alteração no arquivo
+        # Apagar do banco (senão volta no próximo carregamento, ex.: worker novo)
+        self.db.auto_responses.delete_by_trigger(trigger)
         self._save_auto_responses()
         return True
 
+    def _apply_auto_response(self, trigger: str, response: str):
+        """Aplica a auto-resposta em memória no gerenciador e nos bots ativos"""
+        self.auto_responses[trigger] = response
+        # Os bots ativos compartilham o dict e o matcher
+        self.trigger_matcher.compile(self.auto_responses)
+
+    def _discard_auto_response(self, trigger: str):
+        """Remove a auto-resposta da memória do gerenciador e dos bots ativos"""
+        if self.auto_responses.pop(trigger, None) is not None:
+            self.trigger_matcher.compile(self.auto_responses)
+
     def _load_auto_responses(self) -> dict:
         """Carrega auto-respostas do banco de dados"""
         try:
@@ -261,40 +447,108 @@ class BotManager:
         except Exception as e:
             print(f"❌ Erro ao salvar auto-respostas: {e}")
 
-    def get_aggregated_stats(self) -> dict:
-        """Retorna estatísticas agregadas de todos os canais"""
-        all_points = defaultdict(int)
-        all_messages = defaultdict(int)
+    def get_aggregated_stats(
+        self, include_users: bool = False, top: int = 10
+    ) -> dict:
+        """Retorna estatísticas agregadas de todos os canais
 
-        for bot in self.bots.values():
-            for user, pts in bot.user_points.items():
-                all_points[user] += pts
-            for user, msgs in bot.message_count.items():
-                all_messages[user] += msgs
+        Totais e rankings vêm dos agregados incrementais (O(1) + O(top));
+        os dicts completos por usuário só são copiados com include_users.
+        """
+        stats = self.aggregates.snapshot(top)
+        stats["connected_channels"] = list(self.connected_channels)
 
-        return {
-            "points": dict(all_points),
-            "messages": dict(all_messages),
-            "connected_channels": list(self.connected_channels),
-            "total_users": len(all_points),
-            "total_messages": sum(all_messages.values()),
-            "total_points": sum(all_points.values()),
-        }
+        if include_users:
+            stats["points"], stats["messages"] = self.aggregates.user_sums()
+
+        return stats
+
+    def get_stats_delta(self, top: int = 10) -> dict:
+        """Totais e rankings + [pontos, mensagens] só dos usuários alterados
+
+        O custo é proporcional aos usuários alterados desde a última chamada,
+        não ao total de usuários. Quem sumiu de todos os canais vai em removed.
+        """
+        changed = self.take_stats_changes()
+        stats = self.get_aggregated_stats(top=top)
+        stats["users"] = self.get_user_sums(changed)
+        stats["removed"] = [user for user in changed if user not in stats["users"]]
+        return stats
+
+    def take_stats_changes(self) -> List[str]:
+        """Usuários cujos agregados mudaram desde a última chamada"""
+        return list(self.aggregates.take_changes())
+
+    def get_user_sums(self, users: List[str]) -> Dict[str, list]:
+        """[pontos, mensagens] agregados dos usuários informados"""
+        return self.aggregates.sums_for(users)
 
     def get_channel_stats(self, channel: str) -> Optional[dict]:
         """Retorna estatísticas de um canal específico"""
         if channel not in self.bots:
             return None
 
+        # points/messages: usuários carregados em memória; totais do ledger
         bot = self.bots[channel]
+        totals = bot.ledger.totals()
         return {
             "channel": channel,
             "points": dict(bot.user_points),
             "messages": dict(bot.message_count),
             "auto_responses": bot.auto_responses,
-            "total_users": len(bot.user_points),
-            "total_messages": sum(bot.message_count.values()),
+            "top_users": [
+                {"username": user, "points": pts}
+                for user, pts in bot.leaderboard.top(10)
+            ],
+            "total_users": totals["total_users"],
+            "total_messages": totals["total_messages"],
+        }
+
+    def get_leaderboard(
+        self, channel: str, page: int = 1, per_page: int = 25, username: str = None
+    ) -> Optional[dict]:
+        """Retorna uma página do ranking de pontos de um canal
+
+        Páginas e posições dentro do trecho exato do ranking em memória
+        (acima de ledger.rank_floor) saem do Leaderboard em O(log n); só as
+        mais fundas vão ao banco, que pode estar até um flush atrasado.
+        """
+        if channel not in self.bots:
+            return None
+
+        bot, ledger = self.bots[channel], self.bots[channel].ledger
+        page = max(1, page)
+        per_page = max(1, min(per_page, 100))
+        offset = (page - 1) * per_page
+
+        entries = bot.leaderboard.top(per_page, offset)
+        exact = ledger.fully_loaded or (
+            len(entries) == per_page
+            and all(ledger.ranked_exactly(pts) for _, pts in entries)
+        )
+        if not exact:
+            entries = [
+                (row["username"], row["points"])
+                for row in self.db.users.get_top_users(channel, per_page, offset=offset)
+            ]
+        result = {
+            "channel": channel,
+            "page": page,
+            "per_page": per_page,
+            "total_users": ledger.totals()["total_users"],
+            "entries": [
+                {"rank": offset + i + 1, "username": user, "points": pts}
+                for i, (user, pts) in enumerate(entries)
+            ],
         }
+        if username:
+            username = username.lower()
+            points = bot.user_points.get(username)
+            if points is not None and ledger.ranked_exactly(points):
+                result["user_rank"] = bot.leaderboard.rank(username)
+            else:
+                result["user_rank"] = self.db.users.get_rank(username, channel)
+        return result
 
     def disconnect_all(self):
         """Desconecta de todos os canais"""
@@ -302,70 +556,106 @@ class BotManager:
         for channel in channels:
             self.disconnect_from_channel(channel)
 
+    def shutdown(self):
+        """Encerra os bots, grava o que está pendente e fecha o banco
+
+        Chamado uma vez no encerramento do processo (atexit/worker). Os
+        canais fecham todos juntos, com um prazo só (SHUTDOWN_TIMEOUT); quem
+        não fechar a tempo tem os pontos gravados pelo flush logo depois.
+        """
+        if self._shut_down:
+            return
+        self._shut_down = True
+        channels = list(self.connected_channels)
+        ledgers = [bot.ledger for bot in self.bots.values()]
+
+        concurrent.futures.wait(self._close_channels(channels), SHUTDOWN_TIMEOUT)
+        for channel in channels:
+            self._release_channel(channel)
+
+        for ledger in ledgers:
+            ledger.flush()
+        self._close_database()
+
+    def _close_channels(self, channels: List[str]) -> list:
+        """Agenda o fechamento dos canais sem esperar; retorna os futures"""
+        if self.shared_loop:
+            loop = self._shared_loop
+            if not loop or loop.is_closed():
+                return []
+            return [
+                asyncio.run_coroutine_threadsafe(self._detach_channel(channel), loop)
+                for channel in channels
+            ]
+
+        futures = []
+        for channel in channels:
+            bot_instance = self.bots.get(channel)
+            loop = self.bot_loops.get(channel)
+            if bot_instance and loop and not loop.is_closed():
+                futures.append(
+                    asyncio.run_coroutine_threadsafe(bot_instance.close(), loop)
+                )
+        return futures
+
+    def _close_database(self):
+        """Drena os consumidores (chat -> MessageSink) e fecha o banco
+
+        BotDatabase.close grava o MessageSink (e os rollups junto) e fecha
+        o pool, que faz o checkpoint final do WAL.
+        """
+        self.events.close()
+        self.async_db.close()
+        self.db.close()
+
     def _log(self, level: str, message: str):
         """Helper para logging"""
-        if self.on_log_callback:
-            self._safe_callback(self.on_log_callback, level, message)
+        self.events.publish("log", level, message)
 
     def import_user_points(self, username, points, channel=None):
-        """Importa pontos de um usuário para todos os bots ativos ou canal específico"""
+        """Importa pontos de um usuário para todos os bots ativos ou canal específico
+
+        Canal sem bot ativo (ou nenhum bot ativo) recebe os pontos direto
+        no banco, sem passar por um ledger.
+        """
         username = username.lower()
 
         # Se canal específico for informado
-        if channel and channel in self.bots:
-            bot = self.bots[channel]
-            if username in bot.user_points:
-                bot.user_points[username] += points
+        if channel:
+            if channel in self.bots:
+                self.bots[channel].ledger.add_points(username, points)
             else:
-                bot.user_points[username] = points
-            bot.save_data()
+                self.db.users.add_points_bulk(channel, [(username, points)])
             print(f"✅ Importado para {channel}: {username} com {points} pontos")
             return
 
-        # Caso contrário, adiciona para todos os bots ativos
-        for bot in self.bots.values():
-            if username in bot.user_points:
-                bot.user_points[username] += points
-            else:
-                bot.user_points[username] = points
-            bot.save_data()
+        # Caso contrário, adiciona para todos os bots ativos; o ledger de
+        # cada canal grava no banco no próximo flush
+        if not self._apply_imported_points(username, points):
+            self.db.users.add_points_bulk(IMPORT_DEFAULT_CHANNEL, [(username, points)])
+        print(f"✅ Importado: {username} com {points} pontos")
+
+    def _apply_imported_points(self, username: str, points: int) -> int:
+        """Soma pontos importados nos ledgers dos bots ativos; retorna quantos"""
+        bots = list(self.bots.values())
+        for bot in bots:
+            bot.ledger.add_points(username, points)
+        return len(bots)
 
-        # Também salvar no banco de dados para persistência
-        try:
-            # Usar primeiro canal disponível ou 'global'
-            target_channel = list(self.bots.keys())[0] if self.bots else 'global'
-            self.db.users.add_points(username, target_channel, points)
-        except Exception as e:
-            print(f"⚠️ Erro ao salvar no DB: {e}")
 
-        print(f"✅ Importado: {username} com {points} pontos")
-    
 class GUIWrapper:
-    """Wrapper para simular interface GUI para TwitchBot"""
+    """Wrapper para simular interface GUI para TwitchBot
 
-    def __init__(
-        self,
-        channel: str,
-        on_message=None,
-        on_log=None,
-        on_raid=None,
-        callback_lock=None,
-    ):
+    Só publica no barramento de eventos: nunca bloqueia o loop do bot.
+    """
+
+    def __init__(self, channel: str, events: EventBus):
         self.channel = channel
-        self.on_message_callback = on_message
-        self.on_log_callback = on_log
-        self.on_raid_callback = on_raid
-        self.callback_lock = callback_lock or threading.Lock()  # ✅ Thread safety
+        self.events = events
 
     def log(self, icon: str, message: str, tag: str = ""):
-        """Simula método log da GUI"""
-        if self.on_log_callback:
-            # ✅ Thread-safe callback
-            with self.callback_lock:
-                try:
-                    self.on_log_callback(tag or "info", f"{icon} {message}")
-                except Exception as e:
-                    print(f"❌ Erro no log callback: {e}")
+        """Simula método log da GUI (log do canal, vai só para a sala dele)"""
+        self.events.publish("log", tag or "info", f"{icon} {message}", self.channel)
 
     def update_status(self, status: str):
         """Simula atualização de status"""
@@ -374,30 +664,11 @@ class GUIWrapper:
     def update_stats(
         self, username: str, messages: int, points: int, message_text: str = ""
     ):
-        """Simula atualização de stats - THREAD-SAFE"""
-        if self.on_message_callback:
-            # ✅ Thread-safe callback com retry
-            with self.callback_lock:
-                try:
-                    print(
-                        f"🔵 Chamando callback: {self.channel} | {username} | {message_text}"
-                    )
-                    self.on_message_callback(
-                        self.channel, username, message_text, messages, points
-                    )
-                    print(f"✅ Callback executado com sucesso")
-                except Exception as e:
-                    print(f"❌ Erro no callback de mensagem: {e}")
-                    import traceback
-
-                    traceback.print_exc()
+        """Publica a mensagem recebida com os contadores do usuário"""
+        self.events.publish(
+            "message", self.channel, username, message_text, messages, points
+        )
 
     def on_raid(self, raider: str, viewers: int):
         """Callback para evento de raid"""
-        if self.on_raid_callback:
-            # ✅ Thread-safe callback
-            with self.callback_lock:
-                try:
-                    self.on_raid_callback(self.channel, raider, viewers)
-                except Exception as e:
-                    print(f"❌ Erro no callback de raid: {e}")
+        self.events.publish("raid", self.channel, raider, viewers)
@@ -0,0 +1,93 @@
+"""
+Hub de conexão IRC compartilhada entre vários canais
+Uma única conexão TwitchIO entra em muitos canais e roteia os eventos
+para o TwitchBot (e o GUIWrapper) de cada canal
+"""
+
+from typing import TYPE_CHECKING, Dict
+
+from twitchio.ext import commands
+
+from app.core.send_governor import SendGovernor
+
+if TYPE_CHECKING:
+    from app.core.twitch_bot_class import TwitchBot
+
+
+class ChannelHub(commands.Bot):
+    """Conexão IRC única que hospeda vários TwitchBot de canal"""
+
+    def __init__(self, token, prefix, channels):
+        super().__init__(token=token, prefix=prefix, initial_channels=channels)
+        self.routes: Dict[str, "TwitchBot"] = {}
+        self._joined = {ch.lower() for ch in channels}
+        self._ready = False
+        self.governor = SendGovernor(self.loop)  # Fila única da conexão
+
+    @property
+    def channel_count(self) -> int:
+        return len(self.routes)
+
+    async def add_route(self, bot):
+        """Registra o bot de um canal e entra no canal se já estiver conectado"""
+        channel = bot.channel_name.lower()
+        bot.hub = self
+        self.routes[channel] = bot
+
+        if not self._ready:
+            return  # event_ready cuida de entrar e inicializar
+
+        if channel not in self._joined:
+            await self.join_channels([channel])
+            self._joined.add(channel)
+        await bot.on_connected(self.nick)
+
+    async def remove_route(self, channel: str):
+        """Remove o bot de um canal, saindo do canal no IRC"""
+        channel = channel.lower()
+        bot = self.routes.pop(channel, None)
+
+        if channel in self._joined and self._ready:
+            try:
+                await self.part_channels([channel])
+            except Exception as e:
+                print(f"⚠️ Erro ao sair do canal {channel}: {e}")
+        self._joined.discard(channel)
+
+        if bot:
+            await bot.close()
+
+    async def event_ready(self):
+        """Conectado: entra nos canais pendentes e inicializa cada bot"""
+        self._ready = True
+
+        pending = [ch for ch in self.routes if ch not in self._joined]
+        if pending:
+            await self.join_channels(pending)
+            self._joined.update(pending)
+
+        for bot in list(self.routes.values()):
+            await bot.on_connected(self.nick)
+
+    async def event_message(self, message):
+        """Roteia a mensagem para o bot do canal correspondente"""
+        if message.channel is None:
+            return
+
+        bot = self.routes.get(message.channel.name.lower())
+        if bot:
+            await bot.event_message(message)
+
+    async def event_subscription(self, subscription):
+        """Roteia eventos de inscrição para o bot do canal"""
+        bot = self.routes.get(subscription.channel.name.lower())
+        if bot:
+            await bot.event_subscription(subscription)
+
+    async def close(self):
+        """Fecha todos os bots de canal e a conexão compartilhada"""
+        for channel in list(self.routes):
+            await self.remove_route(channel)
+        self.governor.close()
+        await super().close()
+
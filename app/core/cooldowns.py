@@ -0,0 +1,118 @@
+"""
+Cooldowns globais e por usuário para comandos e auto-respostas
+Verificação em O(1) e limpeza preguiçosa das entradas expiradas
+"""
+
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# Padrões (segundos): (global, por usuário). Sem cooldown global: a
+# resposta dos comandos é pessoal, e um viewer não deve bloquear o outro.
+# Auto-respostas sem cooldown, salvo configurado (BOT_COOLDOWNS/env)
+DEFAULT_COMMAND_COOLDOWN = (
+    float(os.getenv("BOT_COMMAND_COOLDOWN_GLOBAL", "0")),
+    float(os.getenv("BOT_COMMAND_COOLDOWN_USER", "10")),
+)
+DEFAULT_TRIGGER_COOLDOWN = (
+    float(os.getenv("BOT_TRIGGER_COOLDOWN_GLOBAL", "0")),
+    float(os.getenv("BOT_TRIGGER_COOLDOWN_USER", "0")),
+)
+
+
+def load_overrides() -> Dict[str, Tuple[float, float]]:
+    """Lê BOT_COOLDOWNS, ex.: {"!top": [10, 30], "trigger:oi": [0, 60]}"""
+    raw = os.getenv("BOT_COOLDOWNS", "")
+    if not raw:
+        return {}
+    try:
+        return {name: (float(g), float(u)) for name, (g, u) in json.loads(raw).items()}
+    except (ValueError, TypeError) as e:
+        print(f"⚠️ BOT_COOLDOWNS inválido: {e}")
+        return {}
+
+
+class CooldownTracker:
+    """Cooldowns por nome (comando/trigger), global e por usuário
+
+    As expirações ficam em um dict (consulta O(1)) e em uma fila por
+    duração. Como todas as entradas de uma fila têm a mesma duração, ela
+    já está ordenada por expiração e a limpeza só olha a frente da fila.
+    A memória fica limitada aos usuários dentro da janela de cooldown.
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, Tuple[float, float]]] = None):
+        self._limits: Dict[str, Tuple[float, float]] = dict(
+            overrides if overrides is not None else load_overrides()
+        )
+        self._expiry: Dict[tuple, float] = {}
+        self._queues: Dict[float, deque] = {}
+
+    def configure(self, name: str, global_seconds: float, user_seconds: float):
+        """Define o cooldown de um comando ("!top") ou trigger ("trigger:oi")"""
+        self._limits[name] = (global_seconds, user_seconds)
+
+    def limits_for(self, name: str) -> Tuple[float, float]:
+        if name in self._limits:
+            return self._limits[name]
+        if name.startswith("trigger:"):
+            return DEFAULT_TRIGGER_COOLDOWN
+        return DEFAULT_COMMAND_COOLDOWN
+
+    def allow(self, name: str, user: str) -> bool:
+        """True se pode executar agora (e já registra o uso)"""
+        now = time.monotonic()
+        self._expire(now)
+
+        global_seconds, user_seconds = self.limits_for(name)
+        if global_seconds and self._expiry.get((name, None), 0) > now:
+            return False
+        if user_seconds and self._expiry.get((name, user), 0) > now:
+            return False
+
+        if global_seconds:
+            self._start((name, None), now, global_seconds)
+        if user_seconds:
+            self._start((name, user), now, user_seconds)
+        return True
+
+    def retry_after(self, name: str, user: str) -> float:
+        """Segundos até o usuário poder executar de novo (0 = já pode)"""
+        now = time.monotonic()
+        expires = max(
+            self._expiry.get((name, None), 0), self._expiry.get((name, user), 0)
+        )
+        return max(0.0, expires - now)
+
+    def should_warn(self, name: str, user: str) -> bool:
+        """True uma vez por bloqueio: avisa o usuário sem virar spam no chat"""
+        now = time.monotonic()
+        wait = math.ceil(self.retry_after(name, user))
+        key = (f"aviso:{name}", user)
+        if not wait or self._expiry.get(key, 0) > now:
+            return False
+        # Segundos inteiros: poucas durações distintas, poucas filas
+        self._start(key, now, wait)
+        return True
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def _start(self, key: tuple, now: float, seconds: float):
+        expires = now + seconds
+        self._expiry[key] = expires
+        queue = self._queues.get(seconds)
+        if queue is None:
+            queue = self._queues[seconds] = deque()
+        queue.append((expires, key))
+
+    def _expire(self, now: float):
+        for queue in self._queues.values():
+            while queue and queue[0][0] <= now:
+                expires, key = queue.popleft()
+                # Só remove se não foi renovada depois
+                if self._expiry.get(key) == expires:
+                    del self._expiry[key]
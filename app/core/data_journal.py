@@ -0,0 +1,93 @@
+"""
+Leitura do bot_data.json antigo (snapshot + journal append-only)
+Os pontos agora ficam no SQLite (PointsLedger); os arquivos só são lidos
+uma vez, para importar os dados antigos, e então renomeados para .imported
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict
+
+# Sufixo dos arquivos já importados no banco
+IMPORTED_SUFFIX = ".imported"
+
+
+class DataJournal:
+    """Snapshot JSON + journal JSON-lines com as alterações desde o snapshot"""
+
+    _instances: Dict[str, "DataJournal"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, data_dir: str, name: str = "bot_data"):
+        self.snapshot_path = os.path.join(data_dir, f"{name}.json")
+        self.journal_path = os.path.join(data_dir, f"{name}.journal")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_dir(cls, data_dir: str, name: str = "bot_data") -> "DataJournal":
+        """Instância compartilhada por caminho (vários bots, um arquivo)"""
+        key = os.path.join(os.path.abspath(data_dir), name)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(data_dir, name)
+            return cls._instances[key]
+
+    def import_once(self, apply: Callable[[dict], object]) -> bool:
+        """Entrega snapshot + journal a apply(data) uma única vez
+
+        Os arquivos são renomeados para .imported antes da leitura (rename é
+        atômico): outro bot ou processo que chegar depois não os encontra.
+        Se apply falhar, os nomes originais voltam para tentar de novo.
+        """
+        with self._lock:
+            claimed = []
+            for path in (self.snapshot_path, self.journal_path):
+                try:
+                    os.rename(path, path + IMPORTED_SUFFIX)
+                    claimed.append(path)
+                except FileNotFoundError:
+                    pass
+            if not claimed:
+                return False
+
+            try:
+                apply(
+                    self._read(
+                        self.snapshot_path + IMPORTED_SUFFIX,
+                        self.journal_path + IMPORTED_SUFFIX,
+                    )
+                )
+            except Exception:
+                for path in claimed:
+                    os.rename(path + IMPORTED_SUFFIX, path)
+                raise
+            return True
+
+    def _read(self, snapshot_path: str, journal_path: str) -> dict:
+        data = {}
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+        points = data.setdefault("points", {})
+        messages = data.setdefault("messages", {})
+
+        if os.path.exists(journal_path):
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Linha incompleta de um crash
+                    self._apply(points, entry.get("points", {}))
+                    self._apply(messages, entry.get("messages", {}))
+        return data
+
+    @staticmethod
+    def _apply(target: dict, changes: dict):
+        for user, value in changes.items():
+            if value is None:
+                target.pop(user, None)
+            else:
+                target[user] = value
@@ -0,0 +1,110 @@
+"""
+Barramento de eventos dos bots
+Cada consumidor (Socket.IO, banco, integrações) tem sua própria fila
+limitada e uma thread de entrega; publicar nunca bloqueia o loop do bot
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+# Tamanho padrão da fila de cada consumidor
+DEFAULT_QUEUE_SIZE = 10000
+
+_STOP = object()
+
+
+class Subscription:
+    """Fila de um consumidor + thread que entrega os eventos ao handler"""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable,
+        kinds: Optional[Iterable[str]] = None,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.name = name
+        self.handler = handler
+        self.kinds = set(kinds) if kinds else None
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._closed = False
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(
+            target=self._dispatch_loop, name=f"event-bus-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def offer(self, kind: str, args: tuple) -> bool:
+        """Enfileira sem bloquear; descarta se a fila estiver cheia"""
+        if self._closed or (self.kinds is not None and kind not in self.kinds):
+            return False
+        if len(self._queue) >= self.maxsize:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                print(f"⚠️ Fila '{self.name}' cheia: {self.dropped} eventos descartados")
+            return False
+        # deque.append é atômico: não precisa de lock
+        self._queue.append((kind, args))
+        self._wakeup.set()
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Entrega o que já está na fila e encerra a thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.append(_STOP)
+        self._wakeup.set()
+        self._thread.join(timeout)
+
+    def _dispatch_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while True:
+                try:
+                    item = self._queue.popleft()
+                except IndexError:
+                    break
+                if item is _STOP:
+                    return
+                kind, args = item
+                try:
+                    self.handler(kind, *args)
+                except Exception as e:
+                    print(f"❌ Erro no consumidor '{self.name}' ({kind}): {e}")
+
+
+class EventBus:
+    """Publica eventos (message, log, status, raid) para vários consumidores"""
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Subscription] = {}
+
+    def subscribe(
+        self,
+        name: str,
+        handler: Callable,
+        kinds: Optional[Iterable[str]] = None,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+    ) -> Subscription:
+        """Registra um consumidor; handler(kind, *args) roda na thread dele"""
+        subscription = Subscription(name, handler, kinds, maxsize)
+        # Cópia + troca: publish itera sem lock sobre um dict que não muda
+        subscriptions = dict(self._subscriptions)
+        subscriptions[name] = subscription
+        self._subscriptions = subscriptions
+        return subscription
+
+    def publish(self, kind: str, *args):
+        """Entrega o evento às filas dos consumidores sem bloquear"""
+        for subscription in self._subscriptions.values():
+            subscription.offer(kind, args)
+
+    def close(self, timeout: float = 5.0):
+        """Drena e encerra todos os consumidores (no encerramento do processo)"""
+        for subscription in self._subscriptions.values():
+            subscription.close(timeout)
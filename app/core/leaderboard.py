@@ -0,0 +1,152 @@
+"""
+Índice ordenado de pontos por canal (skip list indexável)
+Atualização e rank em O(log n), top-K em O(log n + K)
+"""
+
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+MAX_LEVEL = 32
+LEVEL_P = 0.25
+
+
+class _Node:
+    __slots__ = ("key", "next", "span")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        self.span: List[int] = [0] * level
+
+
+class Leaderboard:
+    """Ranking de usuários por pontos (maior primeiro, empate por nome)"""
+
+    def __init__(self, points: Optional[Dict[str, int]] = None):
+        self._head = _Node(None, MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+        self._scores: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        for user, pts in (points or {}).items():
+            self.update(user, pts)
+
+    def __len__(self):
+        return self._size
+
+    def update(self, user: str, points: Optional[int]):
+        """Atualiza os pontos de um usuário (None remove do ranking)"""
+        with self._lock:
+            old = self._scores.get(user)
+            if old == points:
+                return
+            if old is not None:
+                self._delete((-old, user))
+                del self._scores[user]
+            if points is not None:
+                self._insert((-points, user))
+                self._scores[user] = points
+
+    def rank(self, user: str) -> Optional[int]:
+        """Posição (1 = primeiro) do usuário no ranking"""
+        with self._lock:
+            points = self._scores.get(user)
+            if points is None:
+                return None
+
+            key = (-points, user)
+            rank = 0
+            x = self._head
+            for i in reversed(range(self._level)):
+                while x.next[i] is not None and x.next[i].key <= key:
+                    rank += x.span[i]
+                    x = x.next[i]
+                if x.key == key:
+                    return rank
+            return None
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[str, int]]:
+        """Retorna até limit pares (usuário, pontos) a partir de offset"""
+        with self._lock:
+            if limit <= 0 or offset >= self._size:
+                return []
+
+            # Desce até o nó na posição offset (0 = cabeça)
+            traversed = 0
+            x = self._head
+            for i in reversed(range(self._level)):
+                while x.next[i] is not None and traversed + x.span[i] <= offset:
+                    traversed += x.span[i]
+                    x = x.next[i]
+
+            result = []
+            x = x.next[0]
+            while x is not None and len(result) < limit:
+                result.append((x.key[1], -x.key[0]))
+                x = x.next[0]
+            return result
+
+    # ===== SKIP LIST =====
+
+    @staticmethod
+    def _random_level() -> int:
+        level = 1
+        while level < MAX_LEVEL and random.random() < LEVEL_P:
+            level += 1
+        return level
+
+    def _insert(self, key):
+        update = [None] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        x = self._head
+        for i in reversed(range(self._level)):
+            rank[i] = 0 if i == self._level - 1 else rank[i + 1]
+            while x.next[i] is not None and x.next[i].key < key:
+                rank[i] += x.span[i]
+                x = x.next[i]
+            update[i] = x
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.span[i] = self._size
+            self._level = level
+
+        node = _Node(key, level)
+        for i in range(level):
+            node.next[i] = update[i].next[i]
+            update[i].next[i] = node
+            node.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = (rank[0] - rank[i]) + 1
+
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+
+        self._size += 1
+
+    def _delete(self, key):
+        update = [None] * MAX_LEVEL
+        x = self._head
+        for i in reversed(range(self._level)):
+            while x.next[i] is not None and x.next[i].key < key:
+                x = x.next[i]
+            update[i] = x
+
+        x = x.next[0]
+        if x is None or x.key != key:
+            return
+
+        for i in range(self._level):
+            if update[i].next[i] is x:
+                update[i].span[i] += x.span[i] - 1
+                update[i].next[i] = x.next[i]
+            else:
+                update[i].span[i] -= 1
+
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
@@ -0,0 +1,237 @@
+"""
+Livro de pontos de um canal: SQLite é a fonte da verdade
+O UserStore do bot vira um cache write-back: só os usuários que aparecem
+(e os do topo do ranking) são carregados do banco, e as alterações são
+gravadas como deltas em lote (timer e encerramento)
+"""
+
+import asyncio
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+# Usuários do topo do ranking carregados ao conectar (mantém o !top exato)
+PRELOAD_USERS = int(os.getenv("BOT_PRELOAD_USERS", "100"))
+
+
+class PointsLedger:
+    """Deltas pendentes de pontos/mensagens de um canal + carga sob demanda
+
+    Um usuário só é alterado em memória depois de carregado (ensure_loaded
+    no loop, ou a leitura síncrona de add_points para mudanças externas).
+    Gravar deltas (e não valores) evita sobrescrever o que outro processo
+    somou no mesmo canal.
+
+    Os totais do canal são lidos do banco uma vez (preload) e depois
+    seguidos pelos flushes. rank_floor indica até onde o ranking em memória
+    é exato: quem tem mais pontos que ele já está carregado (os pontos só
+    mudam depois que o usuário é carregado).
+    """
+
+    def __init__(self, db, channel: str, points, messages):
+        self.db = db  # AsyncBotDatabase
+        self.channel = channel
+        self.points = points
+        self.messages = messages
+        self.loaded = set()
+        self._pending_points: Dict[str, int] = {}
+        self._pending_messages: Dict[str, int] = {}
+        self._loading = {}  # username -> Task da carga em andamento
+        self._lock = threading.Lock()  # Deltas pendentes
+        self._io_lock = threading.Lock()  # Flush x leitura do banco
+        self._silent = threading.local()
+        self._totals = None  # [usuários, pontos, mensagens] já gravados
+        self.rank_floor: Optional[int] = None
+        points.listeners.append(self._on_points)
+        messages.listeners.append(self._on_messages)
+
+    # ===== CARGA =====
+
+    async def ensure_loaded(self, username: str):
+        """Carrega o usuário do banco (sem bloquear o loop) se ainda não está"""
+        if username in self.loaded:
+            return
+        task = self._loading.get(username)
+        if task is None:
+            task = asyncio.ensure_future(self.db.run(self._read, [username]))
+            self._loading[username] = task
+        try:
+            self._apply(await task)
+        finally:
+            self._loading.pop(username, None)
+
+    async def preload(self, limit: int = PRELOAD_USERS):
+        """Lê os totais do canal e carrega os usuários do topo do ranking"""
+        values, floor = await self.db.run(self._read_top, limit)
+        self._apply(values)
+        self.rank_floor = floor
+
+    def _read_top(self, limit: int):
+        """(executor) Totais do canal + topo do ranking e o piso de pontos dele"""
+        users = self.db.db.users
+        with self._io_lock:
+            stats = users.get_stats(self.channel)
+            self._totals = [
+                stats.get("total_users") or 0,
+                stats.get("total_points") or 0,
+                stats.get("total_messages") or 0,
+            ]
+        if limit <= 0:
+            return {}, None
+        top = users.get_top_users(self.channel, limit)
+        # Menos usuários que o limite: o canal inteiro está em memória
+        floor = top[-1]["points"] if len(top) == limit else -1
+        return self._read([row["username"] for row in top]), floor
+
+    def _read(self, usernames: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """(executor) Valor atual = banco + deltas ainda não gravados"""
+        users = self.db.db.users
+        with self._io_lock:
+            rows = {}
+            with self.db.db.manager.get_connection():
+                for username in usernames:
+                    rows[username] = users.get_by_username(username, self.channel)
+            with self._lock:
+                return {
+                    username: (
+                        (row["points"] if row else 0)
+                        + self._pending_points.get(username, 0),
+                        (row["message_count"] if row else 0)
+                        + self._pending_messages.get(username, 0),
+                    )
+                    for username, row in rows.items()
+                }
+
+    def _apply(self, values: Dict[str, Tuple[int, int]]):
+        """(loop) Coloca os valores lidos no cache sem gerar deltas"""
+        self._silent.active = True
+        try:
+            for username, (points, messages) in values.items():
+                if username in self.loaded:
+                    continue
+                self.points[username] = points
+                self.messages[username] = messages
+                self.loaded.add(username)
+        finally:
+            self._silent.active = False
+
+    # ===== ESCRITA =====
+
+    def add_points(self, username: str, points: int):
+        """Soma pontos vindos de fora do loop do bot (ex.: importação)
+
+        Bloqueante: quem não está em memória é lido do banco antes, para que
+        o Leaderboard e o rank_floor vejam quem passa à frente do topo.
+        """
+        if username not in self.loaded:
+            self._apply(self._read([username]))
+        self.points[username] += points
+
+    def flush(self) -> int:
+        """Grava os deltas pendentes em uma transação; retorna os usuários gravados
+
+        Bloqueante: no loop do bot use await db.run(ledger.flush).
+        """
+        with self._io_lock:
+            with self._lock:
+                points, self._pending_points = self._pending_points, {}
+                messages, self._pending_messages = self._pending_messages, {}
+                # Os totais já contam os deltas que saem de pending
+                self._count(sum(points.values()), sum(messages.values()))
+            if not points and not messages:
+                return 0
+
+            users = self.db.db.users
+            try:
+                with self.db.db.manager.get_connection():
+                    new_users = 0
+                    if self._totals is not None:
+                        changed = points.keys() | messages.keys()
+                        new_users = len(changed) - users.count_existing(
+                            self.channel, changed
+                        )
+                    users.add_points_bulk(self.channel, points.items())
+                    users.increment_messages_bulk(self.channel, messages.items())
+                    self.db.db.analytics.add_points(
+                        self.channel, sum(d for d in points.values() if d > 0)
+                    )
+            except Exception as e:
+                # Devolver os deltas para tentar de novo no próximo flush
+                with self._lock:
+                    self._count(-sum(points.values()), -sum(messages.values()))
+                    for username, delta in points.items():
+                        self._add(self._pending_points, username, delta)
+                    for username, delta in messages.items():
+                        self._add(self._pending_messages, username, delta)
+                print(f"❌ Erro ao gravar pontos de {self.channel}: {e}")
+                return 0
+            with self._lock:
+                self._count(0, 0, new_users)
+            return len(points.keys() | messages.keys())
+
+    def totals(self) -> dict:
+        """Totais do canal: gravados no banco + deltas pendentes
+
+        Antes do preload, só o que está em memória. Usuários novos entram
+        na contagem no flush que os grava.
+        """
+        with self._lock:
+            if self._totals is None:
+                return {
+                    "total_users": len(self.points),
+                    "total_points": sum(self.points.values()),
+                    "total_messages": sum(self.messages.values()),
+                }
+            users, points, messages = self._totals
+            return {
+                "total_users": users,
+                "total_points": points + sum(self._pending_points.values()),
+                "total_messages": messages + sum(self._pending_messages.values()),
+            }
+
+    @property
+    def fully_loaded(self) -> bool:
+        """Se o canal inteiro coube no preload (ranking em memória completo)"""
+        return self.rank_floor is not None and self.rank_floor < 0
+
+    def ranked_exactly(self, points: int) -> bool:
+        """Se a posição de quem tem points no ranking em memória é exata"""
+        return self.fully_loaded or (
+            self.rank_floor is not None and points > self.rank_floor
+        )
+
+    def seed(self, points: dict, messages: dict):
+        """(executor) Soma no canal os dados antigos (bot_data.json), em uma transação
+
+        Quem chama garante que roda uma vez só (DataJournal.import_once).
+        """
+        users = self.db.db.users
+        with self._io_lock, self.db.db.manager.get_connection():
+            users.add_points_bulk(self.channel, points.items())
+            users.increment_messages_bulk(self.channel, messages.items())
+
+    # ===== LISTENERS =====
+
+    def _on_points(self, username: str, old: int, new: int):
+        if not getattr(self._silent, "active", False):
+            with self._lock:
+                self._add(self._pending_points, username, new - old)
+
+    def _on_messages(self, username: str, old: int, new: int):
+        if not getattr(self._silent, "active", False):
+            with self._lock:
+                self._add(self._pending_messages, username, new - old)
+
+    def _count(self, points: int, messages: int, users: int = 0):
+        if self._totals is not None:
+            self._totals[0] += users
+            self._totals[1] += points
+            self._totals[2] += messages
+
+    @staticmethod
+    def _add(pending: Dict[str, int], username: str, delta: int):
+        value = pending.get(username, 0) + delta
+        if value:
+            pending[username] = value
+        else:
+            pending.pop(username, None)
@@ -0,0 +1,138 @@
+"""
+Fila de envio de mensagens com limite de taxa da Twitch
+Uma fila por conexão IRC, com prioridades e coalescência de respostas
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import time
+from collections import deque
+
+# Limites do IRC da Twitch: (mensagens, janela em segundos)
+RATE_LIMITS = {
+    "normal": (20, 30.0),
+    "moderator": (100, 30.0),
+    "verified": (7500, 30.0),
+}
+
+# Prioridades (menor sai primeiro)
+PRIORITY_MANUAL = 0  # Envio pelo dashboard
+PRIORITY_COMMAND = 1  # Respostas a comandos e eventos
+PRIORITY_AUTO = 2  # Auto-respostas
+
+# Máximo de mensagens aguardando por prioridade (o excesso é descartado)
+MAX_PENDING = 200
+
+
+class TokenBucket:
+    """Bucket em que cada token volta exatamente uma janela após o uso
+
+    Assim nenhuma janela deslizante de `period` segundos passa de `capacity`
+    envios, que é como a Twitch conta o limite.
+    """
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.period = period
+        self._spent = deque()  # Momentos em que cada token foi usado
+
+    def delay(self) -> float:
+        """Segundos até haver um token livre (0 = pode enviar agora)"""
+        now = time.monotonic()
+        while self._spent and now - self._spent[0] >= self.period:
+            self._spent.popleft()
+        if len(self._spent) < self.capacity:
+            return 0.0
+        return self.period - (now - self._spent[0])
+
+    def consume(self):
+        self._spent.append(time.monotonic())
+
+
+class SendGovernor:
+    """Fila de saída de uma conexão IRC respeitando o limite da Twitch"""
+
+    def __init__(self, loop, rate_class: str = None):
+        rate_class = rate_class or os.getenv("BOT_RATE_CLASS", "normal")
+        capacity, period = RATE_LIMITS.get(rate_class, RATE_LIMITS["normal"])
+
+        self.loop = loop
+        self.bucket = TokenBucket(capacity, period)
+        self._lanes = [deque() for _ in range(PRIORITY_AUTO + 1)]
+        self._pending = set()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def submit(self, channel, text: str, priority: int = PRIORITY_AUTO) -> bool:
+        """Enfileira uma mensagem (rodar no loop da conexão)
+
+        Retorna False se uma mensagem idêntica para o mesmo canal já estiver
+        na fila (coalescência) ou se a fila da prioridade estiver cheia.
+        """
+        key = (channel.name, text)
+        lane = self._lanes[priority]
+        if key in self._pending or len(lane) >= MAX_PENDING:
+            return False
+
+        self._pending.add(key)
+        lane.append((channel, text))
+        self._wakeup.set()
+
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self._run())
+        return True
+
+    def submit_threadsafe(
+        self, channel, text: str, priority: int = PRIORITY_MANUAL
+    ) -> concurrent.futures.Future:
+        """Enfileira a partir de outra thread (ex.: rota Flask)
+
+        O Future recebe o retorno de submit (False = coalescida ou fila cheia).
+        """
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(self.submit(channel, text, priority))
+            except Exception as e:
+                future.set_exception(e)
+
+        self.loop.call_soon_threadsafe(run)
+        return future
+
+    def _pop_next(self):
+        for lane in self._lanes:
+            if lane:
+                channel, text = lane.popleft()
+                self._pending.discard((channel.name, text))
+                return channel, text
+        return None
+
+    async def _run(self):
+        """Envia a mensagem de maior prioridade sempre que houver token"""
+        while True:
+            if not any(self._lanes):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self.bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            channel, text = self._pop_next()
+            self.bucket.consume()
+            try:
+                await channel.send(text)
+            except Exception as e:
+                print(f"❌ Erro ao enviar mensagem para {channel.name}: {e}")
+
+    def close(self):
+        """Cancela o envio; mensagens pendentes são descartadas"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        for lane in self._lanes:
+            lane.clear()
+        self._pending.clear()
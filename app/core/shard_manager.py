@@ -0,0 +1,451 @@
+"""
+Sharding de canais em múltiplos processos
+Cada processo worker roda seu próprio BotManager (loop compartilhado) e
+devolve os eventos ao processo web por um canal IPC local
+"""
+
+import itertools
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import zlib
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional
+
+from app.core.bot_manager import BotManager
+
+# Raiz do projeto (onde o pacote app/ está) para iniciar os workers com -m
+PROJECT_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../..")
+)
+
+# Métodos do BotManager que o processo web pode chamar nos workers
+WORKER_METHODS = {
+    "connect_to_channel",
+    "disconnect_from_channel",
+    "send_message",
+    "get_channel_stats",
+    "get_aggregated_stats",
+    "get_leaderboard",
+    "take_stats_changes",
+    "get_user_sums",
+    "import_user_points",
+    "_apply_auto_response",
+    "_discard_auto_response",
+    "_apply_imported_points",
+}
+
+
+def shard_for(channel: str, num_shards: int) -> int:
+    """Hash estável (não muda entre execuções) do canal para um shard"""
+    return zlib.crc32(channel.lower().encode("utf-8")) % num_shards
+
+
+class ShardedBotManager(BotManager):
+    """BotManager que distribui os canais entre N processos worker"""
+
+    def __init__(self, num_shards: int = None, request_timeout: float = 10.0):
+        super().__init__()
+        self.num_shards = max(
+            1, num_shards or int(os.getenv("BOT_SHARD_PROCESSES", "2"))
+        )
+        self.request_timeout = request_timeout
+
+        self._authkey = secrets.token_bytes(32)
+        self._listener: Optional[Listener] = None
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._connections: Dict = {}
+        self._ready: Dict[int, threading.Event] = {
+            i: threading.Event() for i in range(self.num_shards)
+        }
+        self._send_locks = {i: threading.Lock() for i in range(self.num_shards)}
+        self._start_lock = threading.Lock()
+        self._pending: Dict[int, tuple] = {}  # request_id -> (worker, Future)
+        self._request_ids = itertools.count(1)
+
+    # ===== CICLO DE VIDA DOS WORKERS =====
+
+    def _ensure_worker(self, index: int):
+        """Inicia o worker do shard se ainda não estiver rodando"""
+        with self._start_lock:
+            if self._listener is None:
+                self._listener = Listener(authkey=self._authkey)
+                threading.Thread(target=self._accept_loop, daemon=True).start()
+
+            process = self._processes.get(index)
+            if process is None or process.poll() is not None:
+                self._ready[index].clear()
+                env = dict(os.environ, BOT_SHARD_AUTHKEY=self._authkey.hex())
+                self._processes[index] = subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-m",
+                        "app.core.shard_manager",
+                        self._listener.address,
+                        str(index),
+                        # Mesmo arquivo do processo web, qualquer que seja o cwd
+                        os.path.abspath(self.db.manager.db_path),
+                    ],
+                    cwd=PROJECT_ROOT,
+                    env=env,
+                )
+
+        if not self._ready[index].wait(self.request_timeout):
+            raise TimeoutError(f"Worker {index} não respondeu")
+
+    def _accept_loop(self):
+        """Aceita conexões dos workers e inicia uma thread leitora por worker"""
+        while True:
+            try:
+                conn = self._listener.accept()
+                hello, index = conn.recv()
+            except Exception as e:
+                print(f"⚠️ Erro ao aceitar worker: {e}")
+                continue
+
+            self._connections[index] = conn
+            threading.Thread(
+                target=self._reader_loop, args=(index, conn), daemon=True
+            ).start()
+            self._ready[index].set()
+
+    def _reader_loop(self, index: int, conn):
+        """Recebe eventos e respostas de um worker"""
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if msg[0] == "reply":
+                _, request_id, ok, result = msg
+                _, future = self._pending.pop(request_id, (None, None))
+                if future:
+                    if ok:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(RuntimeError(result))
+            elif msg[0] == "event":
+                _, kind, args = msg
+                self._dispatch_event(kind, args)
+
+        # Worker morreu: chamadas pendentes falham agora (em vez de esperar o
+        # timeout) e seus canais ficam em erro até reconectar
+        self._ready[index].clear()
+        self._connections.pop(index, None)
+        for request_id, (worker, future) in list(self._pending.items()):
+            if worker == index and self._pending.pop(request_id, None):
+                future.set_exception(
+                    ConnectionError(f"Worker {index} encerrou a conexão")
+                )
+        for channel in list(self.connected_channels):
+            if shard_for(channel, self.num_shards) == index:
+                self.connected_channels.discard(channel)
+                self.events.publish("status", channel, "error")
+
+    def _dispatch_event(self, kind: str, args: tuple):
+        """Repassa eventos do worker para o barramento do processo web"""
+        if kind == "status":
+            channel, status = args
+            if status in ("error", "offline"):
+                self.connected_channels.discard(channel)
+        self.events.publish(kind, *args)
+
+    def _send(self, index: int, request_id: Optional[int], method: str, *args):
+        self._ensure_worker(index)
+        with self._send_locks[index]:
+            self._connections[index].send((request_id, method, args))
+
+    def _call(self, index: int, method: str, *args):
+        """Chama um método no worker e aguarda o resultado"""
+        request_id = next(self._request_ids)
+        future = Future()
+        self._pending[request_id] = (index, future)
+        try:
+            self._send(index, request_id, method, *args)
+            return future.result(timeout=self.request_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _broadcast(self, method: str, *args):
+        """Envia um comando sem resposta para todos os workers ativos"""
+        for index in list(self._connections):
+            try:
+                self._send(index, None, method, *args)
+            except Exception as e:
+                print(f"⚠️ Erro ao enviar {method} ao worker {index}: {e}")
+
+    def shutdown(self):
+        """Encerra todos os workers e fecha o banco do processo web"""
+        if self._shut_down:
+            return
+        self._shut_down = True
+        for index, conn in list(self._connections.items()):
+            try:
+                with self._send_locks[index]:
+                    conn.send(None)
+            except Exception:
+                pass
+        for process in self._processes.values():
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes.clear()
+        # Os workers gravam os próprios pontos ao sair; aqui só falta o chat
+        self.connected_channels.clear()
+        self._close_database()
+
+    # ===== API PÚBLICA (mesma do BotManager) =====
+
+    def connect_to_channel(self, channel: str, token: str, prefix: str = "$") -> bool:
+        """Conecta a um canal no worker do seu shard"""
+        if channel in self.connected_channels:
+            self._log("warning", f"Já conectado ao canal {channel}")
+            return False
+
+        index = shard_for(channel, self.num_shards)
+        try:
+            success = self._call(index, "connect_to_channel", channel, token, prefix)
+        except Exception as e:
+            self._log("error", f"Erro no canal {channel}: {str(e)}")
+            return False
+
+        if success:
+            self.connected_channels.add(channel)
+        return success
+
+    def disconnect_from_channel(self, channel: str) -> bool:
+        """Desconecta um canal no worker do seu shard"""
+        if channel not in self.connected_channels:
+            self._log("warning", f"Não está conectado ao canal {channel}")
+            return False
+
+        index = shard_for(channel, self.num_shards)
+        try:
+            success = self._call(index, "disconnect_from_channel", channel)
+        except Exception as e:
+            self._log("error", f"Erro ao desconectar {channel}: {str(e)}")
+            success = False
+
+        self.connected_channels.discard(channel)
+        return success
+
+    def disconnect_all(self):
+        """Desconecta de todos os canais"""
+        for channel in list(self.connected_channels):
+            self.disconnect_from_channel(channel)
+
+    def send_message(self, channel: str, message: str) -> bool:
+        """Envia mensagem pelo worker que hospeda o canal"""
+        if channel not in self.connected_channels:
+            self._log("warning", f"Bot não conectado ao canal {channel}")
+            return False
+
+        try:
+            return self._call(
+                shard_for(channel, self.num_shards), "send_message", channel, message
+            )
+        except Exception as e:
+            self._log("error", f"Erro ao enviar mensagem: {str(e)}")
+            return False
+
+    def get_channel_stats(self, channel: str) -> Optional[dict]:
+        """Retorna estatísticas de um canal a partir do seu worker"""
+        if channel not in self.connected_channels:
+            return None
+
+        try:
+            return self._call(
+                shard_for(channel, self.num_shards), "get_channel_stats", channel
+            )
+        except Exception as e:
+            print(f"⚠️ Erro ao obter stats de {channel}: {e}")
+            return None
+
+    def get_leaderboard(
+        self, channel: str, page: int = 1, per_page: int = 25, username: str = None
+    ) -> Optional[dict]:
+        """Retorna uma página do ranking a partir do worker do canal"""
+        if channel not in self.connected_channels:
+            return None
+
+        try:
+            return self._call(
+                shard_for(channel, self.num_shards),
+                "get_leaderboard",
+                channel,
+                page,
+                per_page,
+                username,
+            )
+        except Exception as e:
+            print(f"⚠️ Erro ao obter ranking de {channel}: {e}")
+            return None
+
+    def get_aggregated_stats(
+        self, include_users: bool = False, top: int = 10
+    ) -> dict:
+        """Agrega as estatísticas de todos os workers
+
+        Sem include_users, soma os totais e junta os rankings de cada worker
+        (usuários presentes em mais de um shard contam uma vez por shard).
+        """
+        all_points = {}
+        all_messages = {}
+        totals = {"total_users": 0, "total_messages": 0, "total_points": 0}
+
+        for index in list(self._connections):
+            try:
+                stats = self._call(index, "get_aggregated_stats", include_users, top)
+            except Exception as e:
+                print(f"⚠️ Erro ao obter stats do worker {index}: {e}")
+                continue
+
+            for key in totals:
+                totals[key] += stats[key]
+            if include_users:
+                points, messages = stats["points"], stats["messages"]
+            else:
+                points = {e["username"]: e["points"] for e in stats["top_points"]}
+                messages = {
+                    e["username"]: e["messages"] for e in stats["top_messages"]
+                }
+            for user, pts in points.items():
+                all_points[user] = all_points.get(user, 0) + pts
+            for user, msgs in messages.items():
+                all_messages[user] = all_messages.get(user, 0) + msgs
+
+        result = {
+            **totals,
+            "connected_channels": list(self.connected_channels),
+            "top_points": [
+                {"username": user, "points": pts}
+                for user, pts in sorted(all_points.items(), key=lambda x: -x[1])[:top]
+            ],
+            "top_messages": [
+                {"username": user, "messages": msgs}
+                for user, msgs in sorted(all_messages.items(), key=lambda x: -x[1])[
+                    :top
+                ]
+            ],
+        }
+        if include_users:
+            result["points"] = all_points
+            result["messages"] = all_messages
+        return result
+
+    def take_stats_changes(self) -> List[str]:
+        """União dos usuários alterados em todos os workers"""
+        changed = set()
+        for index in list(self._connections):
+            try:
+                changed.update(self._call(index, "take_stats_changes"))
+            except Exception as e:
+                print(f"⚠️ Erro ao obter alterações do worker {index}: {e}")
+        return list(changed)
+
+    def get_user_sums(self, users: List[str]) -> Dict[str, list]:
+        """Soma os [pontos, mensagens] dos usuários em todos os workers"""
+        sums: Dict[str, list] = {}
+        if not users:
+            return sums
+        for index in list(self._connections):
+            try:
+                partial = self._call(index, "get_user_sums", users)
+            except Exception as e:
+                print(f"⚠️ Erro ao obter somas do worker {index}: {e}")
+                continue
+            for user, (pts, msgs) in partial.items():
+                total = sums.setdefault(user, [0, 0])
+                total[0] += pts
+                total[1] += msgs
+        return sums
+
+    def _apply_auto_response(self, trigger: str, response: str):
+        super()._apply_auto_response(trigger, response)
+        self._broadcast("_apply_auto_response", trigger, response)
+
+    def _discard_auto_response(self, trigger: str):
+        super()._discard_auto_response(trigger)
+        self._broadcast("_discard_auto_response", trigger)
+
+    def import_user_points(self, username, points, channel=None):
+        """Importa pontos no worker do canal ou em todos os workers
+
+        Sem worker ativo para o canal (ou nenhum worker), os pontos vão
+        direto para o banco pelo BotManager deste processo, que não tem bots.
+        Erros do worker sobem para quem chamou em vez de serem ignorados.
+        """
+        if channel and channel in self.connected_channels:
+            self._call(
+                shard_for(channel, self.num_shards),
+                "import_user_points",
+                username,
+                points,
+                channel,
+            )
+            return
+        if channel:
+            super().import_user_points(username, points, channel)
+            return
+
+        # Os ledgers dos workers gravam os pontos de seus canais no banco
+        username = username.lower()
+        applied = 0
+        for index in list(self._connections):
+            applied += self._call(index, "_apply_imported_points", username, points)
+        if not applied:
+            super().import_user_points(username, points)
+            return
+        print(f"✅ Importado: {username} com {points} pontos")
+
+
+def run_worker(address: str, index: int, db_path: Optional[str] = None):
+    """Loop principal de um processo worker"""
+    authkey = bytes.fromhex(os.environ["BOT_SHARD_AUTHKEY"])
+    conn = Client(address, authkey=authkey)
+    send_lock = threading.Lock()
+
+    def emit(kind: str, *args):
+        with send_lock:
+            conn.send(("event", kind, args))
+
+    # Só o processo web grava o chat no banco (um escritor para o SQLite)
+    manager = BotManager(shared_loop=True, persist_messages=False, db_path=db_path)
+    # Todos os eventos do worker seguem pelo pipe para o processo web
+    manager.events.subscribe("shard", emit)
+
+    with send_lock:
+        conn.send(("hello", index))
+    print(f"✅ Worker {index} pronto (pid {os.getpid()})")
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+
+        request_id, method, args = msg
+        try:
+            if method not in WORKER_METHODS:
+                raise ValueError(f"Método não permitido: {method}")
+            result, ok = getattr(manager, method)(*args), True
+        except Exception as e:
+            result, ok = str(e), False
+
+        if request_id is not None:
+            with send_lock:
+                conn.send(("reply", request_id, ok, result))
+
+    manager.shutdown()
+    print(f"👋 Worker {index} encerrado")
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1], int(sys.argv[2]), *sys.argv[3:4])
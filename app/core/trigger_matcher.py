@@ -0,0 +1,90 @@
+"""
+Matcher multi-padrão (Aho-Corasick) para auto-respostas
+Encontra todos os triggers em uma única passada pela mensagem
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class TriggerMatcher:
+    """Autômato Aho-Corasick compilado a partir de um dict trigger -> resposta
+
+    A ordem de inserção do dict define a prioridade: quando vários triggers
+    aparecem na mesma mensagem, vence o que foi cadastrado primeiro (mesmo
+    comportamento do loop antigo em ``auto_responses.items()``).
+    """
+
+    def __init__(self, responses: Optional[Dict[str, str]] = None):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Menor índice de prioridade que termina em cada estado (-1 = nenhum)
+        self._best: List[int] = [-1]
+        self._entries: List[Tuple[str, str]] = []
+        self.compile(responses or {})
+
+    def compile(self, responses: Dict[str, str]):
+        """(Re)constrói o autômato a partir das respostas atuais"""
+        goto: List[Dict[str, int]] = [{}]
+        best: List[int] = [-1]
+        entries: List[Tuple[str, str]] = []
+
+        for priority, (trigger, response) in enumerate(responses.items()):
+            entries.append((trigger, response))
+            state = 0
+            for char in trigger.lower():
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    best.append(-1)
+                state = nxt
+            if best[state] == -1:
+                best[state] = priority
+
+        # BFS para links de falha; cada estado herda a melhor saída do sufixo
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(char, 0)
+                fail[nxt] = target if target != nxt else 0
+                inherited = best[fail[nxt]]
+                if inherited != -1 and (best[nxt] == -1 or inherited < best[nxt]):
+                    best[nxt] = inherited
+
+        # Troca atômica: leitores nunca veem um autômato pela metade
+        self._goto, self._fail, self._best, self._entries = goto, fail, best, entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def match(self, content: str) -> Optional[Tuple[str, str]]:
+        """Retorna (trigger, resposta) de maior prioridade presente em content"""
+        goto, fail, best, entries = self._goto, self._fail, self._best, self._entries
+        if not entries:
+            return None
+
+        # Trigger vazio casa com qualquer mensagem (como "" in content)
+        found = best[0]
+        if found == 0:
+            return entries[0]
+
+        state = 0
+        for char in content.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = best[state]
+            if hit != -1 and (found == -1 or hit < found):
+                found = hit
+                if found == 0:
+                    break
+
+        return entries[found] if found != -1 else None
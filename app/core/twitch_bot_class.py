@@ -6,11 +6,33 @@ Sistema de pontos, comandos personalizados e moderação
 from twitchio.ext import commands
 import asyncio
 import json
+import math
 import os
 from datetime import datetime
-from collections import defaultdict
 import random
 
+from app.core.cooldowns import CooldownTracker
+from app.core.data_journal import DataJournal
+from app.core.leaderboard import Leaderboard
+from app.core.points_ledger import PointsLedger
+from app.core.send_governor import (
+    PRIORITY_AUTO,
+    PRIORITY_COMMAND,
+    SendGovernor,
+)
+from app.core.trigger_matcher import TriggerMatcher
+from app.core.user_store import UserStore
+
+# Intervalo (s) do flush dos pontos no banco: um crash perde no máximo isso
+FLUSH_INTERVAL = float(os.getenv("BOT_FLUSH_INTERVAL", "5"))
+
+# Pontos automáticos para quem conversou desde a última rodada
+AWARD_INTERVAL = float(os.getenv("BOT_AWARD_INTERVAL", "300"))
+AWARD_POINTS = int(os.getenv("BOT_AWARD_POINTS", "10"))
+
+# Canal dono do bot_data.json antigo (vazio = o primeiro canal a conectar)
+LEGACY_DATA_CHANNEL = os.getenv("BOT_LEGACY_DATA_CHANNEL", "").strip().lower()
+
 
 class TwitchBot(commands.Bot):
     """Bot com sistema de pontos, comandos e auto-respostas"""
@@ -18,83 +40,140 @@ class TwitchBot(commands.Bot):
     def __init__(self, token, prefix, channels, gui):
         super().__init__(token=token, prefix=prefix, initial_channels=channels)
         self.gui = gui
+        self.command_prefix = prefix
         self.channel_name = channels[0] if channels else "unknown"  # Nome do canal
-        self.user_points = defaultdict(int)
-        self.message_count = defaultdict(int)
+        self._init_user_state()
+        self.active_users = set()  # Quem falou desde o último auto_award_points
         self.auto_responses = {}
+        self.hub = None  # ChannelHub quando a conexão IRC é compartilhada
+        # AsyncBotDatabase e PointsLedger (definidos em attach_db): sempre
+        # com await, nunca chamar o BotDatabase síncrono dentro do loop
+        self.db = None
+        self.ledger = None
+        self.governor = SendGovernor(self.loop)  # Fila de envio desta conexão
+        self.cooldowns = CooldownTracker()
 
         # Pasta para dados
         self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
         os.makedirs(self.data_dir, exist_ok=True)
+        # bot_data.json antigo: importado no banco uma vez e renomeado
+        self.journal = DataJournal.for_dir(self.data_dir)
 
         self.load_data()
+        # Vazio até o BotManager ligar o matcher compartilhado entre os bots
+        self.trigger_matcher = TriggerMatcher()
+
+    def attach_db(self, db):
+        """Liga o bot ao banco: os pontos passam a ser do PointsLedger"""
+        self.db = db
+        self.ledger = PointsLedger(
+            db, self.channel_name, self.user_points, self.message_count
+        )
+
+    def _init_user_state(self):
+        """Cria o UserStore (cache dos pontos) e as visões sobre ele"""
+        self.users = UserStore()
+        self.leaderboard = Leaderboard()
+        self.user_points = self.users.view("points")
+        self.user_points.listeners.append(
+            lambda user, old, new: self.leaderboard.update(user, new)
+        )
+        self.message_count = self.users.view("messages")
 
     def load_data(self):
-        """Carrega dados de pontos, mensagens e auto-respostas"""
+        """Carrega as auto-respostas (pontos vêm do banco, sob demanda)"""
         try:
-            bot_data_file = os.path.join(self.data_dir, "bot_data.json")
-            if os.path.exists(bot_data_file):
-                with open(bot_data_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.user_points = defaultdict(int, data.get("points", {}))
-                    self.message_count = defaultdict(int, data.get("messages", {}))
-                    self.auto_responses = data.get("responses", {})
-
-            # Carregar auto-respostas do arquivo separado
             auto_file = os.path.join(self.data_dir, "auto_responses.json")
             if os.path.exists(auto_file):
                 with open(auto_file, "r", encoding="utf-8") as f:
                     auto_data = json.load(f)
                     self.auto_responses.update(auto_data.get("responses", {}))
 
-            print(
-                f"✅ Dados carregados: {len(self.user_points)} usuários, "
-                f"{len(self.auto_responses)} respostas automáticas"
-            )
+            print(f"✅ Dados carregados: {len(self.auto_responses)} auto-respostas")
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
 
-    def save_data(self):
-        """Salva dados em arquivo"""
+    def _import_legacy_data(self) -> bool:
+        """(executor) Importa o bot_data.json no canal dono dele, uma vez só"""
+        if LEGACY_DATA_CHANNEL and self.channel_name.lower() != LEGACY_DATA_CHANNEL:
+            return False
+        return self.journal.import_once(
+            lambda data: self.ledger.seed(
+                data.get("points", {}), data.get("messages", {})
+            )
+        )
+
+    async def load_points(self):
+        """Importa o JSON antigo (uma vez) e carrega o topo do ranking"""
         try:
-            data = {
-                "points": dict(self.user_points),
-                "messages": dict(self.message_count),
-                # responses agora são gerenciadas separadamente
-                # PATCH_APPLIED_AUTO_RESPONSES
-            }
-            bot_data_file = os.path.join(self.data_dir, "bot_data.json")
-            with open(bot_data_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if await self.db.run(self._import_legacy_data):
+                print(f"✅ [{self.channel_name}] Pontos do bot_data.json importados")
+            await self.ledger.preload()
         except Exception as e:
-            print(f"Erro ao salvar dados: {e}")
+            print(f"Erro ao carregar pontos: {e}")
+
+    async def save_data(self):
+        """Grava no banco os deltas de pontos/mensagens pendentes"""
+        if self.ledger is not None:
+            await self.db.run(self.ledger.flush)
+
+    async def flush_data_periodically(self):
+        """Flush dos pontos a cada FLUSH_INTERVAL segundos"""
+        try:
+            while True:
+                await asyncio.sleep(FLUSH_INTERVAL)
+                await self.save_data()
+        except asyncio.CancelledError:
+            pass
+
+    def queue_send(
+        self, channel, text: str, priority: int = PRIORITY_COMMAND
+    ) -> bool:
+        """Enfileira mensagem na fila com limite de taxa da conexão do canal"""
+        return (self.hub or self).governor.submit(channel, text, priority)
+
+    def reply(self, ctx, text: str) -> bool:
+        """Responde a um comando pela fila de envio"""
+        return self.queue_send(ctx.channel, text, PRIORITY_COMMAND)
+
+    def get_chat_channel(self):
+        """Retorna o Channel do TwitchIO pela conexão que hospeda o canal"""
+        return (self.hub or self).get_channel(self.channel_name)
 
     async def event_ready(self):
         """Executado quando o bot conecta com sucesso"""
+        await self.on_connected(self.nick)
+
+    async def on_connected(self, nick):
+        """Inicializa o canal após a conexão (própria ou via ChannelHub)"""
         self.gui.log(
-            "✅", f"[{self.channel_name}] Bot conectado como: {self.nick}", "success"
+            "✅", f"[{self.channel_name}] Bot conectado como: {nick}", "success"
         )
         self.gui.update_status("online")
+        if self.ledger is not None:
+            await self.load_points()
 
         # ✅ CORREÇÃO: Armazenar task para poder cancelar depois
         self.auto_points_task = self.loop.create_task(self.auto_award_points())
+        self.flush_task = self.loop.create_task(self.flush_data_periodically())
 
     async def auto_award_points(self):
-        """Concede pontos automaticamente a cada 5 minutos"""
+        """Concede pontos a cada AWARD_INTERVAL aos usuários ativos no período"""
         try:
             while True:
-                await asyncio.sleep(300)  # 5 minutos
+                await asyncio.sleep(AWARD_INTERVAL)
 
                 # ✅ CORREÇÃO: Verificar se o loop ainda está rodando
                 if self.loop.is_closed():
                     print(f"⚠️ Loop fechado, parando auto_award_points")
                     break
 
-                for user in list(self.message_count.keys()):
-                    if self.message_count[user] > 0:
-                        self.user_points[user] += 10
+                # Troca o conjunto de uma vez: quem falar agora entra na próxima rodada
+                active, self.active_users = self.active_users, set()
+                for user in active:
+                    self.user_points[user] += AWARD_POINTS
 
-                self.save_data()
+                await self.save_data()
         except asyncio.CancelledError:
             print(f"⚠️ Task auto_award_points cancelada")
         except Exception as e:
@@ -108,9 +187,13 @@ class TwitchBot(commands.Bot):
         username = message.author.name
         content = message.content
 
-        # Contagem e pontos
+        # Contagem e pontos (o usuário é lido do banco na primeira mensagem)
+        if self.ledger is not None:
+            await self.ledger.ensure_loaded(username)
         self.message_count[username] += 1
         self.user_points[username] += 1
+        self.active_users.add(username)
+        self.users.touch(username)
 
         # Atualizar GUI - CORRIGIDO: agora passa o texto da mensagem
         self.gui.update_stats(
@@ -120,23 +203,35 @@ class TwitchBot(commands.Bot):
             message_text=content,  # ✅ Parâmetro nomeado - CORRETO
         )
 
-        # Log com indicação do canal
-        self.gui.log("💬", f"[{self.channel_name}] {username}: {content}", "message")
-
-        # Respostas automáticas
-        for trigger, response in self.auto_responses.items():
-            if trigger.lower() in content.lower():
-                await message.channel.send(response)
-                self.gui.log(
-                    "🤖",
-                    f"[{self.channel_name}] Resposta automática: {response}",
-                    "bot",
-                )
-                break  # Apenas uma resposta por mensagem
+        # Sem eco no log: o chat chega ao dashboard só pelos lotes (chat_batch)
 
-        # Processar comandos
+        # Respostas automáticas (apenas uma por mensagem, primeiro trigger vence)
+        matched = self.trigger_matcher.match(content)
+        if matched and self.cooldowns.allow(f"trigger:{matched[0]}", username):
+            trigger, response = matched
+            self.queue_send(message.channel, response, PRIORITY_AUTO)
+            self.gui.log(
+                "🤖",
+                f"[{self.channel_name}] Resposta automática: {response}",
+                "bot",
+            )
+
+        # Processar comandos (respeitando cooldown global e por usuário)
         try:
-            await self.handle_commands(message)
+            command_name = self._command_name(content)
+            if command_name is None or self.cooldowns.allow(
+                f"!{command_name}", username
+            ):
+                await self.handle_commands(message)
+            elif self.cooldowns.should_warn(f"!{command_name}", username):
+                wait = math.ceil(
+                    self.cooldowns.retry_after(f"!{command_name}", username)
+                )
+                self.queue_send(
+                    message.channel,
+                    f"⏳ @{username}, aguarde {wait}s para usar !{command_name}",
+                    PRIORITY_COMMAND,
+                )
         except Exception as e:
             # ✅ Ignorar erros de comando não encontrado
             if "CommandNotFound" not in str(type(e).__name__):
@@ -149,22 +244,36 @@ class TwitchBot(commands.Bot):
                 "⚠️", f"[{self.channel_name}] Conteúdo suspeito de {username}", "warning"
             )
 
+    def _command_name(self, content: str):
+        """Nome do comando conhecido na mensagem, ou None"""
+        prefix = self.command_prefix
+        if not isinstance(prefix, str) or not content.startswith(prefix):
+            return None
+        parts = content[len(prefix) :].split(maxsplit=1)
+        if parts and parts[0].lower() in self.commands:
+            return parts[0].lower()
+        return None
+
     async def close(self):
         """Método para fechar o bot corretamente"""
         try:
-            # Cancelar task de pontos automáticos
-            if hasattr(self, "auto_points_task") and not self.auto_points_task.done():
-                self.auto_points_task.cancel()
-                try:
-                    await self.auto_points_task
-                except asyncio.CancelledError:
-                    pass
-
-            # Salvar dados antes de fechar
-            self.save_data()
-
-            # Fechar conexão
-            await super().close()
+            # Cancelar tasks de pontos automáticos e de flush
+            for task_name in ("auto_points_task", "flush_task"):
+                task = getattr(self, task_name, None)
+                if task and not task.done():
+                    task.cancel()
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
+
+            # Gravar os pontos pendentes antes de fechar
+            await self.save_data()
+
+            # Fechar conexão (no modo compartilhado o ChannelHub é o dono dela)
+            if self.hub is None:
+                self.governor.close()
+                await super().close()
 
             print(f"✅ Bot fechado corretamente: {self.channel_name}")
         except Exception as e:
@@ -175,14 +284,14 @@ class TwitchBot(commands.Bot):
     @commands.command(name="oi")
     async def hello(self, ctx):
         """Saudação personalizada"""
-        await ctx.send(f"Olá @{ctx.author.name}! 👋 Bem-vindo ao chat!")
+        self.reply(ctx, f"Olá @{ctx.author.name}! 👋 Bem-vindo ao chat!")
         self.gui.log("🤖", f"[{self.channel_name}] Saudando {ctx.author.name}", "bot")
 
     @commands.command(name="dados")
     async def roll_dice(self, ctx):
         """Rola um dado de 1 a 6"""
         numero = random.randint(1, 6)
-        await ctx.send(f"🎲 @{ctx.author.name} rolou um {numero}!")
+        self.reply(ctx, f"🎲 @{ctx.author.name} rolou um {numero}!")
         self.gui.log(
             "🎲", f"[{self.channel_name}] {ctx.author.name} rolou {numero}", "game"
         )
@@ -191,24 +300,22 @@ class TwitchBot(commands.Bot):
     async def check_points(self, ctx):
         """Verifica pontos do usuário"""
         points = self.user_points[ctx.author.name]
-        await ctx.send(f"💰 @{ctx.author.name} tem {points} pontos!")
+        self.reply(ctx, f"💰 @{ctx.author.name} tem {points} pontos!")
 
     @commands.command(name="top")
     async def top_users(self, ctx):
         """Top 5 usuários com mais pontos"""
-        sorted_users = sorted(
-            self.user_points.items(), key=lambda x: x[1], reverse=True
-        )[:5]
+        sorted_users = self.leaderboard.top(5)
         top_list = " | ".join(
             [f"{i+1}. {user}: {pts}pts" for i, (user, pts) in enumerate(sorted_users)]
         )
-        await ctx.send(f"🏆 Top 5: {top_list}")
+        self.reply(ctx, f"🏆 Top 5: {top_list}")
 
     @commands.command(name="comandos")
     async def list_commands(self, ctx):
         """Lista todos os comandos disponíveis"""
-        await ctx.send(
-            "📋 Comandos: !oi, !dados, !pontos, !top, !piada, !hora, !comandos"
+        self.reply(
+            ctx, "📋 Comandos: !oi, !dados, !pontos, !top, !piada, !hora, !comandos"
         )
 
     @commands.command(name="piada")
@@ -222,24 +329,27 @@ class TwitchBot(commands.Bot):
             "O que é um bug na selva? Um inseto programador!",
             "Por que o CSS foi ao terapeuta? Tinha problemas de alinhamento!",
         ]
-        await ctx.send(f"😄 {random.choice(piadas)}")
+        self.reply(ctx, f"😄 {random.choice(piadas)}")
 
     @commands.command(name="hora")
     async def current_time(self, ctx):
         """Mostra horário atual"""
         now = datetime.now().strftime("%H:%M:%S")
-        await ctx.send(f"🕐 Horário atual: {now}")
+        self.reply(ctx, f"🕐 Horário atual: {now}")
 
     @commands.command(name="moeda")
     async def flip_coin(self, ctx):
         """Cara ou coroa"""
         resultado = random.choice(["Cara 🪙", "Coroa 🪙"])
-        await ctx.send(f"@{ctx.author.name} jogou a moeda... {resultado}!")
+        self.reply(ctx, f"@{ctx.author.name} jogou a moeda... {resultado}!")
 
     async def event_subscription(self, subscription):
         """Evento de nova inscrição"""
         username = subscription.user.name
-        await subscription.channel.send(f"🎉 Obrigado pela sub, @{username}! 💜")
+        self.queue_send(
+            subscription.channel, f"🎉 Obrigado pela sub, @{username}! 💜"
+        )
+        if self.ledger is not None:
+            await self.ledger.ensure_loaded(username)
         self.user_points[username] += 500
         self.gui.log("🎉", f"[{self.channel_name}] Nova sub de {username}!", "event")
-        self.save_data()
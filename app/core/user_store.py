@@ -0,0 +1,161 @@
+"""
+Armazenamento compacto do estado dos usuários de um canal
+Cada username recebe um id inteiro; pontos, mensagens e último acesso
+ficam em arrays tipados indexados por esse id
+"""
+
+import threading
+import time
+from array import array
+from collections.abc import MutableMapping
+from typing import List, Optional
+
+
+class _IdIndex:
+    """Hash aberto username -> id guardado em array('q')
+
+    Um dict guardaria um objeto int por id; aqui cada usuário ocupa
+    só os slots da tabela (8 bytes cada, ocupação máxima de 50%).
+    Tabela e máscara ficam em uma tupla, trocada de uma vez no resize:
+    um leitor em outra thread nunca combina a máscara nova com a tabela velha.
+    """
+
+    def __init__(self, names: List[str]):
+        self._names = names
+        self._slots = (array("q", [-1]) * 8, 7)  # (tabela, máscara)
+
+    def get(self, username: str) -> Optional[int]:
+        table, mask = self._slots
+        names = self._names
+        i = hash(username) & mask
+        while True:
+            user_id = table[i]
+            if user_id == -1:
+                return None
+            if names[user_id] == username:
+                return user_id
+            i = (i + 1) & mask
+
+    def add(self, user_id: int):
+        """Indexa names[user_id] (que ainda não pode estar no índice)"""
+        table, mask = self._slots
+        if (user_id + 1) * 2 > len(table):
+            # A reconstrução já indexa todos os nomes, inclusive o novo
+            self._resize(len(table) * 2)
+            return
+        self._place(user_id, table, mask)
+
+    def _place(self, user_id: int, table, mask: int):
+        i = hash(self._names[user_id]) & mask
+        while table[i] != -1:
+            i = (i + 1) & mask
+        table[i] = user_id
+
+    def _resize(self, size: int):
+        # Monta a tabela nova antes de trocar: leitores nunca a veem vazia
+        table = array("q", [-1]) * size
+        mask = size - 1
+        for user_id in range(len(self._names)):
+            self._place(user_id, table, mask)
+        self._slots = (table, mask)
+
+
+class UserStore:
+    """Tabela username -> id com colunas em arrays tipados"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._index = _IdIndex(self.names)
+        self.points = array("q")
+        self.messages = array("q")
+        self.last_seen = array("d")
+        self.on_new_user = []  # Callbacks fn(username) para usuários novos
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, username: str) -> bool:
+        return self._index.get(username) is not None
+
+    def get_id(self, username: str) -> Optional[int]:
+        """Id do usuário, ou None se nunca foi visto"""
+        return self._index.get(username)
+
+    def intern(self, username: str) -> int:
+        """Retorna o id do usuário, criando o registro se necessário"""
+        user_id = self._index.get(username)
+        if user_id is not None:
+            return user_id
+
+        with self._lock:
+            user_id = self._index.get(username)
+            if user_id is not None:
+                return user_id
+            user_id = len(self.names)
+            self.points.append(0)
+            self.messages.append(0)
+            self.last_seen.append(0.0)
+            self.names.append(username)
+            self._index.add(user_id)
+        for callback in self.on_new_user:
+            callback(username)
+        return user_id
+
+    def touch(self, username: str):
+        """Registra o horário da última mensagem do usuário"""
+        self.last_seen[self.intern(username)] = time.time()
+
+    def view(self, column: str) -> "CounterView":
+        return CounterView(self, column)
+
+
+class CounterView(MutableMapping):
+    """Visão tipo defaultdict(int) de uma coluna do UserStore
+
+    Chama cada listener(username, antigo, novo) a cada escrita, para manter
+    índices como o Leaderboard, os agregados e o PointsLedger em sincronia.
+    Usuário ausente lê 0 sem ser criado; remover apenas zera o contador
+    (o id continua reservado).
+    """
+
+    def __init__(self, store: UserStore, column: str):
+        self._store = store
+        self._column: array = getattr(store, column)
+        self.listeners = []
+
+    def __getitem__(self, username: str) -> int:
+        user_id = self._store.get_id(username)
+        return 0 if user_id is None else self._column[user_id]
+
+    def get(self, username: str, default: Optional[int] = None):
+        user_id = self._store.get_id(username)
+        return default if user_id is None else self._column[user_id]
+
+    def __setitem__(self, username: str, value: int):
+        user_id = self._store.intern(username)
+        old = self._column[user_id]
+        self._column[user_id] = value
+        username = self._store.names[user_id]
+        for listener in self.listeners:
+            listener(username, old, value)
+
+    def __delitem__(self, username: str):
+        if username not in self._store:
+            raise KeyError(username)
+        self[username] = 0
+
+    def __contains__(self, username) -> bool:
+        return username in self._store
+
+    def __iter__(self):
+        return iter(self._store.names)
+
+    def __len__(self):
+        return len(self._store.names)
+
+    def items(self):
+        return zip(self._store.names, self._column)
+
+    def values(self):
+        return iter(self._column)
@@ -0,0 +1,139 @@
+"""
+Acesso assíncrono ao BotDatabase para código que roda em loop asyncio
+Cada chamada vai para um executor próprio do banco (fila limitada + threads
+dedicadas); a corrotina só espera o resultado, o loop do canal segue livre
+Localização: app/database/async_db.py
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import functools
+import os
+import queue
+import threading
+from typing import Callable
+
+# Threads do executor (as escritas no SQLite são serializadas de qualquer
+# forma; mais threads só ajudam leituras concorrentes)
+ASYNC_WORKERS = int(os.getenv("DB_ASYNC_WORKERS", "4"))
+# Chamadas pendentes além disso fazem a corrotina esperar (backpressure)
+ASYNC_QUEUE_SIZE = int(os.getenv("DB_ASYNC_QUEUE_SIZE", "1000"))
+# Intervalo (s) entre tentativas de enfileirar com a fila cheia
+ASYNC_RETRY_INTERVAL = 0.01
+
+_STOP = object()
+
+
+class DatabaseExecutor:
+    """Threads dedicadas ao banco com fila limitada
+
+    Diferente do ThreadPoolExecutor (fila sem limite), submit() falha com
+    queue.Full quando há chamadas demais pendentes; run() aguarda a vaga
+    sem bloquear o loop. Funciona com qualquer loop (um por canal ou o
+    compartilhado), pois o resultado volta por asyncio.wrap_future.
+    """
+
+    def __init__(
+        self, workers: int = ASYNC_WORKERS, max_pending: int = ASYNC_QUEUE_SIZE
+    ):
+        self.workers = max(1, workers)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._threads = []
+        self._closed = False
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Enfileira fn(*args, **kwargs); levanta queue.Full se não houver vaga"""
+        if self._closed:
+            raise RuntimeError("Executor do banco encerrado")
+        self._ensure_started()
+        future = concurrent.futures.Future()
+        self._queue.put_nowait((future, fn, args, kwargs))
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Executa fn no executor e aguarda o resultado sem bloquear o loop"""
+        while True:
+            try:
+                future = self.submit(fn, *args, **kwargs)
+                break
+            except queue.Full:
+                await asyncio.sleep(ASYNC_RETRY_INTERVAL)
+        return await asyncio.wrap_future(future)
+
+    def close(self, timeout: float = 10.0):
+        """Executa o que já está na fila e encerra as threads"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._start_lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(
+                        target=self._run, name=f"db-executor-{i}", daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class AsyncCRUD:
+    """Versão awaitable de um objeto CRUD: await adb.users.add_points(...)"""
+
+    def __init__(self, executor: DatabaseExecutor, crud):
+        self._executor = executor
+        self._crud = crud
+
+    def __getattr__(self, name: str):
+        method = getattr(self._crud, name)
+        if name.startswith("_") or not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await self._executor.run(method, *args, **kwargs)
+
+        # Cache: o próximo acesso não passa por __getattr__
+        setattr(self, name, call)
+        return call
+
+
+class AsyncBotDatabase:
+    """Fachada assíncrona do BotDatabase (users, messages, auto_responses)"""
+
+    def __init__(self, db, executor: DatabaseExecutor = None):
+        self.db = db
+        self.executor = executor or DatabaseExecutor()
+        # Depois do BotDatabase: no atexit (ordem inversa) fecha antes dele
+        atexit.register(self.close)
+        self.users = AsyncCRUD(self.executor, db.users)
+        self.messages = AsyncCRUD(self.executor, db.messages)
+        self.auto_responses = AsyncCRUD(self.executor, db.auto_responses)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Executa qualquer função bloqueante do banco no executor"""
+        return await self.executor.run(fn, *args, **kwargs)
+
+    def close(self):
+        self.executor.close()
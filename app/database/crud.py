@@ -4,23 +4,51 @@ Operações de banco de dados usando SQLite
 Localização: app/database/crud.py
 """
 
+import atexit
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import queue
+import threading
+import time
+from typing import Iterable, List, Dict, Optional, Tuple
 from contextlib import contextmanager
 import os
 
+from app.database.message_sink import MessageSink
+from app.database.partitions import MessagePartitions, fts_query, fts_table
+from app.database.rollups import DAY, HOUR, Rollups
+from app.database.schema import check_query_plan, migrate
+from app.database.storage import Checkpointer, checkpoint, connect
+
 # Models are now defined inline in this file
 # No need to import from models.py since we use direct SQL queries
 
+# Pool de conexões: máximo de conexões abertas e espera por uma livre (s)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 
 class DatabaseManager:
-    """Gerenciador central do banco de dados"""
+    """Gerenciador central do banco de dados
 
-    def __init__(self, db_path: str = "database/bot_data.db"):
+    Mantém um pool limitado de conexões abertas (reaproveitadas entre
+    threads). Dentro de um get_connection, chamadas aninhadas na mesma
+    thread reusam a conexão e participam da mesma transação.
+    """
+
+    def __init__(self, db_path: str = "database/bot_data.db", pool_size: int = None):
         self.db_path = db_path
+        self.pool_size = max(1, pool_size or DB_POOL_SIZE)
+        self._pool = queue.LifoQueue()  # LIFO: reusa as conexões mais quentes
+        self._created = 0
+        self._closed = False
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+        self.keys = KeyCache()
+        self.partitions = MessagePartitions()
+        self.rollups = Rollups()
         self._ensure_directory()
         self._initialize_db()
+        Checkpointer.shared().register(self.db_path)
 
     def _ensure_directory(self):
         """Garante que o diretório existe"""
@@ -28,16 +56,88 @@ class DatabaseManager:
 
     @contextmanager
     def get_connection(self):
-        """Context manager para conexões thread-safe"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        conn.row_factory = sqlite3.Row  # Retorna dicts
+        """Context manager para conexões thread-safe (commit/rollback no fim)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # Aninhado: a transação é da chamada externa
+            yield conn
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
         try:
             yield conn
             conn.commit()
+            # Ids criados na transação só agora valem para as outras conexões
+            self.keys.commit(conn)
         except Exception as e:
             conn.rollback()
+            # Ids e partições criados na transação deixaram de existir
+            self.keys.discard(conn)
+            self.partitions.reset()
             raise e
         finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def _create_connection(self) -> sqlite3.Connection:
+        # Pragmas do perfil de armazenamento (WAL etc.) aplicados uma vez aqui
+        return connect(self.db_path, check_same_thread=False)
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Pega uma conexão livre, cria uma nova ou espera se o pool encheu"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._pool_lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._pool.get(timeout=DB_POOL_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Nenhuma conexão livre em {DB_POOL_TIMEOUT}s ({self.db_path})"
+            )
+
+    def _release(self, conn: sqlite3.Connection):
+        self.keys.discard(conn)
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._pool.put(conn)
+
+    def close(self):
+        """Fecha as conexões livres; as em uso fecham ao serem devolvidas"""
+        self._closed = True
+        Checkpointer.shared().unregister(self.db_path)
+        first = True
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            if first:
+                # Esvazia o WAL antes de fechar
+                try:
+                    checkpoint(conn, "TRUNCATE")
+                except sqlite3.Error as e:
+                    print(f"⚠️ Erro no checkpoint final: {e}")
+                first = False
             conn.close()
 
     def _initialize_db(self):
@@ -46,13 +146,218 @@ class DatabaseManager:
 
         with self.get_connection() as conn:
             create_tables(conn)
+            migrate(conn)
+            self.check_query_plans(conn)
+
+    def check_query_plans(self, conn: sqlite3.Connection = None) -> Dict[str, bool]:
+        """Confere com EXPLAIN que as queries quentes usam seus índices
+
+        As queries de mensagens são conferidas na partição mais recente
+        (puladas enquanto não houver nenhuma).
+        """
+        if conn is None:
+            with self.get_connection() as conn:
+                return self.check_query_plans(conn)
+
+        table = self.partitions.latest(conn)
+        results = {}
+        for name, sql, params, index in QUERY_PLAN_CHECKS:
+            if "{table}" in sql:
+                if table is None:
+                    continue
+                sql, index = sql.format(table=table), index.format(table=table)
+            results[name] = check_query_plan(conn, sql, params, index)
+            if not results[name]:
+                print(f"⚠️ Query '{name}' não usa o índice {index}")
+        return results
+
+
+# ===== CHAVES INTEIRAS =====
+
+
+class KeyCache:
+    """Cache nome -> id das tabelas channels e users
+
+    Evita ir ao banco para traduzir canal/username em chave inteira a
+    cada escrita. Ids lidos dentro de uma transação de escrita ficam
+    pendentes na conexão e só entram no cache compartilhado depois do
+    commit: num rollback o SQLite pode reusar o rowid, e outra thread
+    gravaria linhas apontando para o canal/usuário errado.
+    """
+
+    MAX_ENTRIES = 200_000
+
+    def __init__(self):
+        self._caches = {"channels": {}, "users": {}}
+        self._pending: Dict[int, Dict[str, Dict[str, int]]] = {}  # id(conn) -> ...
+        self._lock = threading.Lock()
+
+    def channel_id(
+        self, conn: sqlite3.Connection, name: str, create: bool = True
+    ) -> Optional[int]:
+        return self._resolve(conn, "channels", "name", name, create)
+
+    def user_id(
+        self, conn: sqlite3.Connection, username: str, create: bool = True
+    ) -> Optional[int]:
+        return self._resolve(conn, "users", "username", username, create)
+
+    def clear(self):
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+
+    def commit(self, conn: sqlite3.Connection):
+        """Publica os ids da transação da conexão (chamar após o commit)"""
+        with self._lock:
+            pending = self._pending.pop(id(conn), None)
+            for table, values in (pending or {}).items():
+                cache = self._caches[table]
+                if len(cache) + len(values) > self.MAX_ENTRIES:
+                    cache.clear()
+                cache.update(values)
+
+    def discard(self, conn: sqlite3.Connection):
+        """Esquece os ids da transação da conexão (rollback)"""
+        with self._lock:
+            self._pending.pop(id(conn), None)
+
+    def _resolve(self, conn, table: str, column: str, value: str, create: bool):
+        cache = self._caches[table]
+        key_id = cache.get(value)
+        if key_id is not None:
+            return key_id
+        pending = self._pending.get(id(conn), {}).get(table)
+        if pending and value in pending:
+            return pending[value]
+
+        if create:
+            conn.execute(
+                f"INSERT INTO {table} ({column}) VALUES (?) "
+                f"ON CONFLICT({column}) DO NOTHING",
+                (value,),
+            )
+        row = conn.execute(
+            f"SELECT id FROM {table} WHERE {column} = ?", (value,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        with self._lock:
+            if conn.in_transaction:
+                # Pode ter sido criado agora: só vale para as outras após o commit
+                tables = self._pending.setdefault(id(conn), {})
+                tables.setdefault(table, {})[value] = row[0]
+            else:
+                if len(cache) >= self.MAX_ENTRIES:
+                    cache.clear()
+                cache[value] = row[0]
+        return row[0]
+
+
+# ===== QUERIES COM ÍNDICE =====
+
+# Colunas aceitas em get_top_users (nunca interpolar entrada do usuário)
+TOP_USERS_ORDER = {
+    "points": "points",
+    "message_count": "message_count",
+    "messages": "message_count",
+}
+# Empate desempatado pelo nome, como no Leaderboard em memória
+TOP_USERS_SQL = """SELECT * FROM v_users
+                   WHERE channel_id = ?
+                   ORDER BY {column} DESC, username
+                   LIMIT ? OFFSET ?"""
+# Mensagens: uma query por partição ({table}), no formato antigo de linha
+MESSAGES_COLUMNS = """SELECT m.id, u.username, c.name AS channel, m.message,
+                             m.user_id, m.created_at, m.channel_id,
+                             datetime(m.created_at, 'unixepoch') AS timestamp"""
+MESSAGES_SELECT = (
+    MESSAGES_COLUMNS
+    + """ FROM {table} m
+          JOIN channels c ON c.id = m.channel_id
+          JOIN users u ON u.id = m.user_id"""
+)
+RECENT_MESSAGES_SQL = (
+    MESSAGES_SELECT
+    + """ WHERE m.channel_id = ?
+          ORDER BY m.created_at DESC
+          LIMIT ?"""
+)
+USER_MESSAGES_SQL = (
+    MESSAGES_SELECT
+    + """ WHERE m.channel_id = ? AND m.user_id = ?
+          ORDER BY m.created_at DESC
+          LIMIT ?"""
+)
+RANGE_MESSAGES_SQL = (
+    MESSAGES_SELECT
+    + """ WHERE m.channel_id = ? AND m.created_at >= ? AND m.created_at < ?
+          ORDER BY m.created_at
+          LIMIT ?"""
+)
+# Busca de texto: o FTS5 da partição acha os ids, a partição dá as colunas.
+# {filters} recebe as condições opcionais de canal/usuário/tempo/cursor
+SEARCH_MESSAGES_SQL = (
+    MESSAGES_COLUMNS
+    + """ FROM {fts} f
+          JOIN {table} m ON m.id = f.rowid
+          JOIN channels c ON c.id = m.channel_id
+          JOIN users u ON u.id = m.user_id
+          WHERE {fts} MATCH ?{filters}
+          ORDER BY f.rowid DESC
+          LIMIT ?"""
+)
+
+# (nome, sql, parâmetros de exemplo, índice esperado) para check_query_plans
+QUERY_PLAN_CHECKS = [
+    (
+        "top_points",
+        TOP_USERS_SQL.format(column="points"),
+        (1, 10, 0),
+        "idx_user_points_channel_points",
+    ),
+    (
+        "top_messages",
+        TOP_USERS_SQL.format(column="message_count"),
+        (1, 10, 0),
+        "idx_user_points_channel_messages",
+    ),
+    (
+        "recent_messages",
+        RECENT_MESSAGES_SQL,
+        (1, 100),
+        "idx_{table}_channel_time",
+    ),
+    (
+        "user_messages",
+        USER_MESSAGES_SQL,
+        (1, 1, 50),
+        "idx_{table}_channel_user_time",
+    ),
+]
+
+# Epoch atual em SQL (datas são INTEGER no schema normalizado)
+NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
 
 
 # ===== USERS CRUD =====
 
+# UPSERTs atômicos: cria o registro ou soma ao contador em um único comando
+UPSERT_POINTS = f"""INSERT INTO user_points (channel_id, user_id, points)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(channel_id, user_id) DO UPDATE
+                    SET points = points + excluded.points,
+                        updated_at = {NOW}"""
+UPSERT_MESSAGES = f"""INSERT INTO user_points (channel_id, user_id, message_count)
+                      VALUES (?, ?, ?)
+                      ON CONFLICT(channel_id, user_id) DO UPDATE
+                      SET message_count = message_count + excluded.message_count,
+                          updated_at = {NOW}"""
+
 
 class UserCRUD:
-    """Operações CRUD para usuários"""
+    """Operações CRUD para usuários (pontos e mensagens por canal)"""
 
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
@@ -63,9 +368,14 @@ class UserCRUD:
         """Cria novo usuário"""
         with self.db.get_connection() as conn:
             cursor = conn.execute(
-                """INSERT INTO users (username, channel, points, message_count)
+                """INSERT INTO user_points (channel_id, user_id, points, message_count)
                    VALUES (?, ?, ?, ?)""",
-                (username, channel, points, message_count),
+                (
+                    self.db.keys.channel_id(conn, channel),
+                    self.db.keys.user_id(conn, username),
+                    points,
+                    message_count,
+                ),
             )
             return cursor.lastrowid
 
@@ -73,16 +383,20 @@ class UserCRUD:
         """Busca usuário por ID"""
         with self.db.get_connection() as conn:
             row = conn.execute(
-                "SELECT * FROM users WHERE id = ?", (user_id,)
+                "SELECT * FROM v_users WHERE id = ?", (user_id,)
             ).fetchone()
             return dict(row) if row else None
 
     def get_by_username(self, username: str, channel: str) -> Optional[Dict]:
         """Busca usuário por username e canal"""
         with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            user_id = self.db.keys.user_id(conn, username, create=False)
+            if channel_id is None or user_id is None:
+                return None
             row = conn.execute(
-                "SELECT * FROM users WHERE username = ? AND channel = ?",
-                (username, channel),
+                "SELECT * FROM v_users WHERE channel_id = ? AND user_id = ?",
+                (channel_id, user_id),
             ).fetchone()
             return dict(row) if row else None
 
@@ -98,62 +412,141 @@ class UserCRUD:
         """Atualiza pontos do usuário"""
         with self.db.get_connection() as conn:
             cursor = conn.execute(
-                """UPDATE users SET points = ?, updated_at = CURRENT_TIMESTAMP
-                   WHERE username = ? AND channel = ?""",
-                (points, username, channel),
+                f"""UPDATE user_points SET points = ?, updated_at = {NOW}
+                    WHERE channel_id = ? AND user_id = ?""",
+                (
+                    points,
+                    self.db.keys.channel_id(conn, channel, create=False),
+                    self.db.keys.user_id(conn, username, create=False),
+                ),
             )
             return cursor.rowcount > 0
 
     def add_points(self, username: str, channel: str, points: int) -> int:
-        """Adiciona pontos ao usuário"""
-        user = self.get_or_create(username, channel)
-        new_points = user["points"] + points
-        self.update_points(username, channel, new_points)
-        return new_points
-
-    def increment_messages(self, username: str, channel: str) -> int:
-        """Incrementa contador de mensagens"""
+        """Adiciona pontos ao usuário (criando-o se preciso) e retorna o total"""
         with self.db.get_connection() as conn:
-            conn.execute(
-                """UPDATE users 
-                   SET message_count = message_count + 1,
-                       updated_at = CURRENT_TIMESTAMP
-                   WHERE username = ? AND channel = ?""",
-                (username, channel),
-            )
+            row = conn.execute(
+                UPSERT_POINTS + " RETURNING points",
+                (
+                    self.db.keys.channel_id(conn, channel),
+                    self.db.keys.user_id(conn, username),
+                    points,
+                ),
+            ).fetchone()
+            return row["points"]
 
+    def add_points_bulk(self, channel: str, deltas: Iterable[Tuple[str, int]]) -> int:
+        """Soma pontos de vários (username, delta) em uma transação"""
+        return self._bulk(UPSERT_POINTS, channel, deltas)
+
+    def increment_messages(self, username: str, channel: str, count: int = 1) -> int:
+        """Incrementa contador de mensagens e retorna o novo valor"""
+        with self.db.get_connection() as conn:
             row = conn.execute(
-                "SELECT message_count FROM users WHERE username = ? AND channel = ?",
-                (username, channel),
+                UPSERT_MESSAGES + " RETURNING message_count",
+                (
+                    self.db.keys.channel_id(conn, channel),
+                    self.db.keys.user_id(conn, username),
+                    count,
+                ),
             ).fetchone()
-            return row["message_count"] if row else 0
+            return row["message_count"]
+
+    def increment_messages_bulk(
+        self, channel: str, counts: Iterable[Tuple[str, int]]
+    ) -> int:
+        """Incrementa mensagens de vários (username, quantidade) em uma transação"""
+        return self._bulk(UPSERT_MESSAGES, channel, counts)
+
+    def count_existing(self, channel: str, usernames: Iterable[str]) -> int:
+        """Quantos dos usernames já têm registro no canal (busca pela chave)"""
+        with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            if channel_id is None:
+                return 0
+            user_ids = [
+                user_id
+                for user_id in (
+                    self.db.keys.user_id(conn, username, create=False)
+                    for username in usernames
+                )
+                if user_id is not None
+            ]
+            count = 0
+            for i in range(0, len(user_ids), 500):
+                chunk = user_ids[i : i + 500]
+                count += conn.execute(
+                    "SELECT COUNT(*) FROM user_points WHERE channel_id = ? "
+                    f"AND user_id IN ({','.join('?' * len(chunk))})",
+                    (channel_id, *chunk),
+                ).fetchone()[0]
+            return count
+
+    def _bulk(self, sql: str, channel: str, deltas: Iterable[Tuple[str, int]]) -> int:
+        with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel)
+            user_id = self.db.keys.user_id
+            cursor = conn.executemany(
+                sql,
+                (
+                    (channel_id, user_id(conn, username), delta)
+                    for username, delta in deltas
+                ),
+            )
+            return cursor.rowcount
 
     def get_top_users(
-        self, channel: str, limit: int = 10, order_by: str = "points"
+        self, channel: str, limit: int = 10, order_by: str = "points", offset: int = 0
     ) -> List[Dict]:
         """Retorna top usuários por pontos ou mensagens"""
+        if order_by not in TOP_USERS_ORDER:
+            raise ValueError(f"Ordenação inválida: {order_by}")
+
         with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            if channel_id is None:
+                return []
             rows = conn.execute(
-                f"""SELECT * FROM users 
-                    WHERE channel = ?
-                    ORDER BY {order_by} DESC
-                    LIMIT ?""",
-                (channel, limit),
+                TOP_USERS_SQL.format(column=TOP_USERS_ORDER[order_by]),
+                (channel_id, limit, offset),
             ).fetchall()
             return [dict(row) for row in rows]
 
+    def get_rank(self, username: str, channel: str) -> Optional[int]:
+        """Posição (1 = primeiro) do usuário no ranking de pontos do canal"""
+        with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            user_id = self.db.keys.user_id(conn, username, create=False)
+            row = conn.execute(
+                "SELECT points FROM user_points WHERE channel_id = ? AND user_id = ?",
+                (channel_id, user_id),
+            ).fetchone()
+            if row is None:
+                return None
+            # Empate desempatado pelo nome (como TOP_USERS_SQL e o Leaderboard);
+            # usa o índice (channel_id, points)
+            ahead = conn.execute(
+                """SELECT COUNT(*) FROM user_points p
+                   JOIN users u ON u.id = p.user_id
+                   WHERE p.channel_id = ?
+                     AND (p.points > ? OR (p.points = ? AND u.username < ?))""",
+                (channel_id, row["points"], row["points"], username),
+            ).fetchone()[0]
+            return ahead + 1
+
     def get_all_by_channel(self, channel: str) -> List[Dict]:
         """Retorna todos usuários de um canal"""
         with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
             rows = conn.execute(
-                "SELECT * FROM users WHERE channel = ?", (channel,)
+                "SELECT * FROM v_users WHERE channel_id = ?", (channel_id,)
             ).fetchall()
             return [dict(row) for row in rows]
 
     def delete(self, user_id: int) -> bool:
         """Deleta usuário"""
         with self.db.get_connection() as conn:
-            cursor = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            cursor = conn.execute("DELETE FROM user_points WHERE id = ?", (user_id,))
             return cursor.rowcount > 0
 
     def get_stats(self, channel: str) -> Dict:
@@ -165,7 +558,8 @@ class UserCRUD:
                     SUM(points) as total_points,
                     SUM(message_count) as total_messages,
                     AVG(points) as avg_points
-                   FROM users WHERE channel = ?""",
+                   FROM user_points
+                   WHERE channel_id = (SELECT id FROM channels WHERE name = ?)""",
                 (channel,),
             ).fetchone()
             return dict(row) if row else {}
@@ -175,7 +569,7 @@ class UserCRUD:
 
 
 class MessageCRUD:
-    """Operações CRUD para mensagens"""
+    """Operações CRUD para mensagens (histórico particionado por tempo)"""
 
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
@@ -183,56 +577,205 @@ class MessageCRUD:
     def create(
         self, username: str, channel: str, message: str, user_id: Optional[int] = None
     ) -> int:
-        """Cria nova mensagem"""
+        """Cria uma mensagem (uma transação por chamada; o chat usa message_sink)
+
+        user_id é o id em users (o mesmo para o usuário em todos os canais);
+        se omitido, é obtido pelo username.
+        """
         with self.db.get_connection() as conn:
-            cursor = conn.execute(
-                """INSERT INTO messages (username, channel, message, user_id)
-                   VALUES (?, ?, ?, ?)""",
-                (username, channel, message, user_id),
+            row = (
+                self.db.keys.channel_id(conn, channel),
+                user_id or self.db.keys.user_id(conn, username),
+                message,
+                int(time.time()),
             )
-            return cursor.lastrowid
+            return self._insert(conn, [row])[0]
+
+    def create_many(self, rows: Iterable[Tuple[str, str, str, int]]) -> int:
+        """Grava várias (username, canal, mensagem, epoch) em uma transação"""
+        with self.db.get_connection() as conn:
+            keys = self.db.keys
+            ids = self._insert(
+                conn,
+                [
+                    (
+                        keys.channel_id(conn, channel),
+                        keys.user_id(conn, username),
+                        message,
+                        created_at,
+                    )
+                    for username, channel, message, created_at in rows
+                ],
+            )
+            return len(ids)
+
+    def _insert(self, conn: sqlite3.Connection, rows: list) -> List[int]:
+        """Partição + índice de texto + rollups, na mesma transação"""
+        ids = self.db.partitions.insert_many(conn, rows)
+        self.db.rollups.record_messages(
+            conn, ((row[0], row[1], row[3]) for row in rows)
+        )
+        return ids
 
     def get_recent(self, channel: str, limit: int = 100) -> List[Dict]:
         """Retorna mensagens recentes de um canal"""
         with self.db.get_connection() as conn:
-            rows = conn.execute(
-                """SELECT * FROM messages 
-                   WHERE channel = ?
-                   ORDER BY timestamp DESC
-                   LIMIT ?""",
-                (channel, limit),
-            ).fetchall()
-            return [dict(row) for row in rows]
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            if channel_id is None:
+                return []
+            return self._collect(conn, RECENT_MESSAGES_SQL, (channel_id,), limit)
 
     def get_by_user(self, username: str, channel: str, limit: int = 50) -> List[Dict]:
         """Retorna mensagens de um usuário específico"""
         with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            user_id = self.db.keys.user_id(conn, username, create=False)
+            if channel_id is None or user_id is None:
+                return []
+            return self._collect(
+                conn, USER_MESSAGES_SQL, (channel_id, user_id), limit
+            )
+
+    def get_range(
+        self, channel: str, start: int, end: int, limit: int = 1000
+    ) -> List[Dict]:
+        """Mensagens do canal com start <= created_at < end (epoch), em ordem
+
+        Só as partições que cruzam o intervalo são consultadas.
+        """
+        with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            if channel_id is None:
+                return []
+            tables = self.db.partitions.tables(conn, start, end, newest_first=False)
+            return self._collect(
+                conn, RANGE_MESSAGES_SQL, (channel_id, start, end), limit, tables
+            )
+
+    def _collect(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: tuple,
+        limit: int,
+        tables: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """Percorre as partições em ordem até juntar limit linhas"""
+        if tables is None:
+            tables = self.db.partitions.tables(conn)
+        result = []
+        for table in tables:
+            if len(result) >= limit:
+                break
             rows = conn.execute(
-                """SELECT * FROM messages 
-                   WHERE username = ? AND channel = ?
-                   ORDER BY timestamp DESC
-                   LIMIT ?""",
-                (username, channel, limit),
+                sql.format(table=table), params + (limit - len(result),)
             ).fetchall()
-            return [dict(row) for row in rows]
+            result.extend(dict(row) for row in rows)
+        return result
+
+    def search(
+        self,
+        text: str,
+        channel: Optional[str] = None,
+        username: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """Busca de texto no histórico, das mensagens mais novas às mais antigas
+
+        since/until (epoch) limitam as partições consultadas. Retorna
+        {"messages": [...], "next_cursor": str | None}; next_cursor é passado
+        de volta para buscar a página seguinte.
+        """
+        query = fts_query(text)
+        if not query:
+            raise ValueError("Texto de busca vazio")
+        before = self._parse_cursor(cursor)
+
+        result = {"messages": [], "next_cursor": None}
+        with self.db.get_connection() as conn:
+            filters, params = [], []
+            for name, value, lookup in (
+                ("channel_id", channel, self.db.keys.channel_id),
+                ("user_id", username, self.db.keys.user_id),
+            ):
+                if value is None:
+                    continue
+                # Nomes como foram gravados (o canal fica como foi digitado)
+                key_id = lookup(conn, value, create=False)
+                if key_id is None:
+                    return result
+                filters.append(f"m.{name} = ?")
+                params.append(key_id)
+            if since is not None:
+                filters.append("m.created_at >= ?")
+                params.append(since)
+            if until is not None:
+                filters.append("m.created_at < ?")
+                params.append(until)
+
+            messages = result["messages"]
+            starts = []  # Partição de cada mensagem da página (para o cursor)
+            for start, _, table in self.db.partitions.ranges(conn, since, until):
+                if before and start > before[0]:
+                    continue  # Partição já percorrida em páginas anteriores
+                page_filters, page_params = list(filters), list(params)
+                if before and start == before[0]:
+                    page_filters.append("f.rowid < ?")
+                    page_params.append(before[1])
+
+                sql = SEARCH_MESSAGES_SQL.format(
+                    fts=fts_table(table),
+                    table=table,
+                    filters="".join(f" AND {f}" for f in page_filters),
+                )
+                rows = conn.execute(
+                    sql, [query, *page_params, limit + 1 - len(messages)]
+                ).fetchall()
+                for row in rows:
+                    if len(messages) == limit:
+                        # Há mais resultados: a próxima página começa aqui
+                        result["next_cursor"] = f"{starts[-1]}:{messages[-1]['id']}"
+                        return result
+                    messages.append(dict(row))
+                    starts.append(start)
+        return result
+
+    @staticmethod
+    def _parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+        if not cursor:
+            return None
+        try:
+            start, message_id = cursor.split(":")
+            return int(start), int(message_id)
+        except ValueError:
+            raise ValueError(f"Cursor inválido: {cursor}")
 
     def count_by_channel(self, channel: str) -> int:
         """Conta mensagens do canal"""
         with self.db.get_connection() as conn:
-            row = conn.execute(
-                "SELECT COUNT(*) as count FROM messages WHERE channel = ?", (channel,)
-            ).fetchone()
-            return row["count"] if row else 0
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            if channel_id is None:
+                return 0
+            return sum(
+                conn.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE channel_id = ?",
+                    (channel_id,),
+                ).fetchone()[0]
+                for table in self.db.partitions.tables(conn)
+            )
 
     def delete_old_messages(self, days: int = 30) -> int:
-        """Deleta mensagens antigas"""
+        """Deleta mensagens antigas apagando as partições expiradas
+
+        Custo por partição (DROP TABLE), não por mensagem; a partição que
+        contém o corte fica até expirar inteira.
+        """
         with self.db.get_connection() as conn:
-            cursor = conn.execute(
-                """DELETE FROM messages 
-                   WHERE timestamp < datetime('now', '-' || ? || ' days')""",
-                (days,),
-            )
-            return cursor.rowcount
+            cutoff = int(time.time()) - days * 86400
+            return self.db.partitions.drop_before(conn, cutoff)
 
 
 # ===== AUTO RESPONSES CRUD =====
@@ -361,6 +904,71 @@ class AutoResponseCRUD:
             return cursor.rowcount > 0
 
 
+# ===== ANALYTICS =====
+
+HOURLY_SQL = """SELECT hour AS time, messages, chatters, points, raids
+                FROM rollup_hourly
+                WHERE channel_id = ? AND hour >= ? AND hour < ?
+                ORDER BY hour"""
+# Dia: soma das horas + chatters únicos do dia (não somáveis)
+DAILY_SQL = f"""SELECT h.hour - h.hour % {DAY} AS time,
+                       SUM(h.messages) AS messages,
+                       COALESCE(d.chatters, 0) AS chatters,
+                       SUM(h.points) AS points,
+                       SUM(h.raids) AS raids
+                FROM rollup_hourly h
+                LEFT JOIN rollup_daily d
+                       ON d.channel_id = h.channel_id
+                      AND d.day = h.hour - h.hour % {DAY}
+                WHERE h.channel_id = ? AND h.hour >= ? AND h.hour < ?
+                GROUP BY 1
+                ORDER BY 1"""
+ANALYTICS_BUCKETS = {"hour": (HOURLY_SQL, HOUR), "day": (DAILY_SQL, DAY)}
+
+
+class AnalyticsCRUD:
+    """Séries por canal lidas só dos rollups (ver rollups.py)"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+
+    def add_points(self, channel: str, points: int):
+        """Soma pontos concedidos na hora atual do canal"""
+        if points:
+            with self.db.get_connection() as conn:
+                channel_id = self.db.keys.channel_id(conn, channel)
+                self.db.rollups.add(conn, channel_id, points=points)
+
+    def record_raid(self, channel: str, raider: str, viewers: int) -> int:
+        """Grava a raid recebida e a soma no rollup da hora"""
+        with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel)
+            cursor = conn.execute(
+                "INSERT INTO raids (channel_id, raider_name, viewers) VALUES (?, ?, ?)",
+                (channel_id, raider, viewers),
+            )
+            self.db.rollups.add(conn, channel_id, raids=1)
+            return cursor.lastrowid
+
+    def get_series(
+        self, channel: str, since: int, until: int, bucket: str = "hour"
+    ) -> List[Dict]:
+        """Mensagens, chatters, pontos e raids por hora ou dia em [since, until)"""
+        if bucket not in ANALYTICS_BUCKETS:
+            raise ValueError(f"Intervalo inválido: {bucket}")
+        sql, size = ANALYTICS_BUCKETS[bucket]
+
+        with self.db.get_connection() as conn:
+            channel_id = self.db.keys.channel_id(conn, channel, create=False)
+            if channel_id is None:
+                return []
+            # Alinha ao início do bucket para não cortar o primeiro dia
+            rows = conn.execute(
+                sql, (channel_id, since - since % size, until)
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+
 # ===== CLASSE PRINCIPAL =====
 
 
@@ -374,13 +982,24 @@ class BotDatabase:
         self.users = UserCRUD(self.manager)
         self.messages = MessageCRUD(self.manager)
         self.auto_responses = AutoResponseCRUD(self.manager)
+        self.analytics = AnalyticsCRUD(self.manager)
         self.streamers = StreamersCRUD(self.manager)
         self.oauth_config = OAuthConfigCRUD(self.manager)
         self.oauth_tokens = OAuthTokensCRUD(self.manager)
 
+        # Histórico de chat gravado em lote (para volume alto de mensagens)
+        self.message_sink = MessageSink(self.messages.create_many)
+        # Rede de segurança: BotManager.shutdown normalmente fecha antes
+        atexit.register(self.close)
+
     def close(self):
-        """Fecha conexões (se necessário)"""
-        pass  # SQLite fecha automaticamente via context manager
+        """Grava as mensagens pendentes e fecha as conexões do pool
+
+        Os rollups são gravados junto com as mensagens (e os pontos, no
+        flush dos ledgers), então esvaziar o MessageSink basta para eles.
+        """
+        self.message_sink.close()
+        self.manager.close()
 
 
 # ===== STREAMERS CRUD =====
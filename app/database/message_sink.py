@@ -0,0 +1,141 @@
+"""
+Gravação em lote (write-behind) das mensagens de chat
+Os bots só enfileiram; uma thread grava com executemany, uma transação
+por lote, limitada por tamanho e por tempo
+Localização: app/database/message_sink.py
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+MESSAGE_BATCH_SIZE = int(os.getenv("DB_MESSAGE_BATCH_SIZE", "500"))
+# Tempo máximo (segundos) que uma mensagem espera na fila antes do flush
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("DB_MESSAGE_FLUSH_INTERVAL", "0.5"))
+# Mensagens na fila além disso fazem quem enfileira esperar (backpressure)
+MESSAGE_QUEUE_SIZE = int(os.getenv("DB_MESSAGE_QUEUE_SIZE", "20000"))
+# Quanto tempo put() espera por espaço antes de descartar a mensagem
+MESSAGE_PUT_TIMEOUT = 1.0
+
+_STOP = object()
+
+
+class MessageSink:
+    """Fila de mensagens + thread escritora
+
+    A thread só é criada no primeiro put(). Em close() (chamado por
+    BotDatabase.close no encerramento) tudo o que está na fila é gravado.
+    write_batch recebe a lista de (username, canal, mensagem, epoch) e grava
+    tudo em uma transação (MessageCRUD.create_many).
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[Iterable[tuple]], int],
+        batch_size: int = MESSAGE_BATCH_SIZE,
+        flush_interval: float = MESSAGE_FLUSH_INTERVAL,
+        max_pending: int = MESSAGE_QUEUE_SIZE,
+    ):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._closed = False
+        self._start_lock = threading.Lock()
+
+    def put(
+        self,
+        username: str,
+        channel: str,
+        message: str,
+        timestamp: Optional[int] = None,
+    ) -> bool:
+        """Enfileira uma mensagem; bloqueia se a fila estiver cheia
+
+        timestamp é o epoch (segundos) da mensagem; padrão: agora.
+        """
+        if self._closed:
+            return False
+        self._ensure_started()
+        if timestamp is None:
+            timestamp = int(time.time())
+        try:
+            self._queue.put(
+                (username, channel, message, timestamp),
+                timeout=MESSAGE_PUT_TIMEOUT,
+            )
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                print(f"⚠️ Fila de mensagens cheia: {self.dropped} descartadas")
+            return False
+
+    def flush(self):
+        """Aguarda até tudo o que foi enfileirado estar gravado"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float = 10.0):
+        """Grava o que falta e encerra a thread escritora"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="message-sink", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: list):
+        for attempt in range(3):
+            try:
+                self.write_batch(batch)
+                self.written += len(batch)
+                return
+            except Exception as e:
+                print(f"❌ Erro ao gravar {len(batch)} mensagens: {e}")
+                time.sleep(0.5 * (attempt + 1))
+        self.dropped += len(batch)
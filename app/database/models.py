@@ -8,6 +8,8 @@ from datetime import datetime
 from typing import Optional
 from pathlib import Path
 
+from app.database.storage import Checkpointer, connect
+
 
 class Database:
     """Classe base para gerenciamento de banco de dados"""
@@ -15,6 +17,7 @@ class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.ensure_database_exists()
+        Checkpointer.shared().register(db_path)
 
     def ensure_database_exists(self):
         """Garante que o diretório do banco existe"""
@@ -22,9 +25,8 @@ class Database:
 
     def get_connection(self) -> sqlite3.Connection:
         """Retorna uma conexão com o banco de dados"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
-        return conn
+        # Perfil de armazenamento: WAL, synchronous NORMAL, mmap, cache...
+        return connect(self.db_path)
 
     def execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
         """Executa uma query e retorna o cursor"""
@@ -62,189 +64,15 @@ class BotDataDB(Database):
         self.create_tables()
 
     def create_tables(self):
-        """Cria as tabelas necessárias"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Tabela de usuários
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                display_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """
-        )
-
-        # Tabela de canais
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS channels (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                channel_name TEXT NOT NULL UNIQUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """
-        )
-
-        # Tabela de pontos (relacionamento usuário-canal)
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS user_points (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                channel_id INTEGER NOT NULL,
-                points INTEGER DEFAULT 0,
-                messages INTEGER DEFAULT 0,
-                last_message_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (channel_id) REFERENCES channels(id) ON DELETE CASCADE,
-                UNIQUE(user_id, channel_id)
-            )
-        """
-        )
-
-        # Tabela de auto-respostas
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS auto_responses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                channel_id INTEGER,
-                trigger TEXT NOT NULL,
-                response TEXT NOT NULL,
-                enabled BOOLEAN DEFAULT 1,
-                use_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (channel_id) REFERENCES channels(id) ON DELETE CASCADE
-            )
-        """
-        )
-
-        # Tabela de raids
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS raids (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                channel_id INTEGER NOT NULL,
-                raider_name TEXT NOT NULL,
-                viewers INTEGER NOT NULL,
-                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (channel_id) REFERENCES channels(id) ON DELETE CASCADE
-            )
-        """
-        )
-
-        # Tabela de streamers favoritos
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS streamers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                display_name TEXT NOT NULL,
-                auto_connect BOOLEAN DEFAULT 0,
-                enabled BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """
-        )
-
-        # Tabela de tokens OAuth
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS oauth_tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                provider TEXT NOT NULL,
-                user_id TEXT NOT NULL,
-                access_token TEXT NOT NULL,
-                refresh_token TEXT,
-                expires_at TIMESTAMP,
-                scope TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(provider, user_id)
-            )
-        """
-        )
+        """Cria as tabelas necessárias (mesmo schema usado pelo crud.py)"""
+        from app.database.schema import migrate
 
-        # Tabela de configurações OAuth
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS oauth_config (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                provider TEXT NOT NULL UNIQUE,
-                client_id TEXT NOT NULL,
-                client_secret TEXT NOT NULL,
-                redirect_uri TEXT NOT NULL,
-                auth_uri TEXT,
-                token_uri TEXT,
-                user_info_uri TEXT,
-                scopes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """
-        )
-
-        # Índices para performance
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_user_points_user 
-            ON user_points(user_id)
-        """
-        )
-
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_user_points_channel 
-            ON user_points(channel_id)
-        """
-        )
-
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_auto_responses_trigger 
-            ON auto_responses(trigger)
-        """
-        )
-
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_raids_channel 
-            ON raids(channel_id)
-        """
-        )
-
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_streamers_username 
-            ON streamers(username)
-        """
-        )
-
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_oauth_tokens_provider 
-            ON oauth_tokens(provider)
-        """
-        )
-
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_oauth_config_provider 
-            ON oauth_config(provider)
-        """
-        )
-
-        conn.commit()
-        conn.close()
+        conn = self.get_connection()
+        try:
+            create_tables(conn)
+            migrate(conn)
+        finally:
+            conn.close()
 
 
 class LogsDB(Database):
@@ -345,11 +173,8 @@ class LogsDB(Database):
 # ===== FUNÇÕES AUXILIARES =====
 
 
-def create_tables(conn):
-    """Cria todas as tabelas necessárias no banco de dados"""
-    cursor = conn.cursor()
-
-    # Tabela de usuários
+def _create_base_tables(cursor):
+    """users/messages desnormalizados (versão 0 do schema)"""
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -375,6 +200,19 @@ def create_tables(conn):
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
         )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
+
+
+def create_tables(conn):
+    """Cria todas as tabelas necessárias no banco de dados"""
+    from app.database.schema import get_version
+
+    cursor = conn.cursor()
+
+    # Schema base (versão 0) de users/messages; as migrações de schema.py
+    # o convertem para o schema normalizado (channels/users/user_points)
+    if get_version(conn) == 0:
+        _create_base_tables(cursor)
 
     # Tabela de auto-respostas
     cursor.execute("""
@@ -436,9 +274,7 @@ def create_tables(conn):
     """)
 
     # Índices
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_channel ON users(channel)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages(channel)")
+    # users/messages/user_points: schema e índices em schema.py
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_auto_responses_trigger ON auto_responses(trigger)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_streamers_username ON streamers(username)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_oauth_tokens_provider ON oauth_tokens(provider)")
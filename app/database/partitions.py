@@ -0,0 +1,250 @@
+"""
+Histórico de chat particionado por tempo
+Cada partição é uma tabela messages_AAAAMMDD com as mensagens de um
+intervalo [start, end) em epoch, mais o índice de texto messages_AAAAMMDD_fts
+(FTS5); a retenção apaga partições inteiras (DROP TABLE) em vez de DELETE
+linha a linha
+Localização: app/database/partitions.py
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Dias por partição (1 = diária, 7 = semanal)
+PARTITION_DAYS = max(1, int(os.getenv("DB_MESSAGE_PARTITION_DAYS", "1")))
+PARTITION_SECONDS = PARTITION_DAYS * 86400
+
+# Registro das partições e sequência global dos ids de mensagem
+# (cada tabela tem seu rowid; o id precisa ser único entre elas)
+REGISTRY_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS message_partitions (
+           name TEXT PRIMARY KEY,
+           start INTEGER NOT NULL,
+           end INTEGER NOT NULL,
+           row_count INTEGER NOT NULL DEFAULT 0
+       )""",
+    """CREATE TABLE IF NOT EXISTS message_sequence (
+           value INTEGER NOT NULL
+       )""",
+]
+
+PARTITION_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS {table} (
+           id INTEGER PRIMARY KEY,
+           channel_id INTEGER NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+           user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+           message TEXT NOT NULL,
+           created_at INTEGER NOT NULL
+       )""",
+    "CREATE INDEX IF NOT EXISTS idx_{table}_channel_time "
+    "ON {table}(channel_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_{table}_channel_user_time "
+    "ON {table}(channel_id, user_id, created_at DESC)",
+    # Índice de texto com conteúdo externo: o texto fica só em {table}
+    """CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+           message,
+           content='{table}',
+           content_rowid='id',
+           tokenize='unicode61 remove_diacritics 2'
+       )""",
+]
+
+INSERT_PARTITION = """INSERT INTO {table} (id, channel_id, user_id, message, created_at)
+                      VALUES (?, ?, ?, ?, ?)"""
+INSERT_FTS = "INSERT INTO {table}_fts (rowid, message) VALUES (?, ?)"
+
+
+def partition_name(start: int) -> str:
+    return "messages_" + time.strftime("%Y%m%d", time.gmtime(start))
+
+
+def create_registry(conn: sqlite3.Connection):
+    for statement in REGISTRY_SCHEMA:
+        conn.execute(statement)
+    if conn.execute("SELECT 1 FROM message_sequence").fetchone() is None:
+        conn.execute("INSERT INTO message_sequence (value) VALUES (0)")
+
+
+def create_partition(conn: sqlite3.Connection, start: int, end: int) -> str:
+    """Cria a tabela da partição [start, end) e a registra"""
+    table = partition_name(start)
+    for statement in PARTITION_SCHEMA:
+        conn.execute(statement.format(table=table))
+    conn.execute(
+        "INSERT OR IGNORE INTO message_partitions (name, start, end) VALUES (?, ?, ?)",
+        (table, start, end),
+    )
+    return table
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def fts_query(text: str) -> str:
+    """Converte o texto digitado em uma expressão FTS5 segura
+
+    "entre aspas" busca a frase exata; senão todas as palavras (AND).
+    Aspas internas são escapadas, então operadores não vazam para o MATCH.
+    """
+    text = text.strip()
+    if len(text) > 1 and text.startswith('"') and text.endswith('"'):
+        terms = [text[1:-1]]
+    else:
+        terms = text.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms if term)
+
+
+def next_ids(conn: sqlite3.Connection, count: int) -> int:
+    """Reserva count ids na sequência; retorna o primeiro"""
+    last = conn.execute(
+        "UPDATE message_sequence SET value = value + ? RETURNING value", (count,)
+    ).fetchone()[0]
+    return last - count + 1
+
+
+class MessagePartitions:
+    """Cache das partições existentes + roteamento de escrita e leitura
+
+    As partições não se sobrepõem: uma nova é alinhada a PARTITION_SECONDS
+    e cortada nos limites das vizinhas (caso PARTITION_DAYS tenha mudado).
+    Como KeyCache, é recarregada do banco após um rollback.
+    """
+
+    def __init__(self, span: int = PARTITION_SECONDS):
+        self.span = span
+        self._starts: List[int] = []
+        self._parts: List[Tuple[int, int, str]] = []  # (start, end, nome)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._loaded = False
+
+    def _load(self, conn: sqlite3.Connection):
+        if self._loaded:
+            return
+        rows = conn.execute(
+            "SELECT start, end, name FROM message_partitions ORDER BY start"
+        ).fetchall()
+        self._parts = [tuple(row) for row in rows]
+        self._starts = [part[0] for part in self._parts]
+        self._loaded = True
+
+    def _find(self, created_at: int) -> Optional[str]:
+        i = bisect.bisect_right(self._starts, created_at) - 1
+        if i >= 0 and created_at < self._parts[i][1]:
+            return self._parts[i][2]
+        return None
+
+    def table_for(self, conn: sqlite3.Connection, created_at: int) -> str:
+        """Partição de created_at (criada se ainda não existir)"""
+        with self._lock:
+            self._load(conn)
+            table = self._find(created_at)
+            if table is not None:
+                return table
+
+            start = created_at - created_at % self.span
+            end = start + self.span
+            i = bisect.bisect_right(self._starts, created_at)
+            if i > 0:
+                start = max(start, self._parts[i - 1][1])
+            if i < len(self._parts):
+                end = min(end, self._parts[i][0])
+
+            table = create_partition(conn, start, end)
+            self._parts.insert(i, (start, end, table))
+            self._starts.insert(i, start)
+            return table
+
+    def ranges(
+        self,
+        conn: sqlite3.Connection,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> List[Tuple[int, int, str]]:
+        """(start, end, nome) das partições que cruzam [since, until)"""
+        with self._lock:
+            self._load(conn)
+            parts = [
+                part
+                for part in self._parts
+                if (since is None or part[1] > since)
+                and (until is None or part[0] < until)
+            ]
+        return parts[::-1] if newest_first else parts
+
+    def tables(
+        self,
+        conn: sqlite3.Connection,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> List[str]:
+        """Partições que cruzam [since, until) (poda por intervalo de tempo)"""
+        return [part[2] for part in self.ranges(conn, since, until, newest_first)]
+
+    def latest(self, conn: sqlite3.Connection) -> Optional[str]:
+        tables = self.tables(conn)
+        return tables[0] if tables else None
+
+    def insert_many(
+        self, conn: sqlite3.Connection, rows: Iterable[Tuple[int, int, str, int]]
+    ) -> List[int]:
+        """Grava (channel_id, user_id, mensagem, epoch); retorna os ids"""
+        rows = list(rows)
+        if not rows:
+            return []
+        first = next_ids(conn, len(rows))
+        ids = list(range(first, first + len(rows)))
+
+        by_table: Dict[str, list] = defaultdict(list)
+        for message_id, (channel_id, user_id, message, created_at) in zip(ids, rows):
+            table = self.table_for(conn, created_at)
+            by_table[table].append(
+                (message_id, channel_id, user_id, message, created_at)
+            )
+
+        for table, batch in by_table.items():
+            conn.executemany(INSERT_PARTITION.format(table=table), batch)
+            # Índice de texto na mesma transação: nunca fica fora de sincronia
+            conn.executemany(
+                INSERT_FTS.format(table=table),
+                ((row[0], row[3]) for row in batch),
+            )
+            conn.execute(
+                "UPDATE message_partitions SET row_count = row_count + ? "
+                "WHERE name = ?",
+                (len(batch), table),
+            )
+        return ids
+
+    def drop_before(self, conn: sqlite3.Connection, cutoff: int) -> int:
+        """Apaga as partições que terminam até cutoff; retorna as linhas removidas
+
+        Uma partição que ainda tem mensagens mais novas que cutoff fica
+        inteira até expirar por completo.
+        """
+        with self._lock:
+            self._load(conn)
+            expired = [part for part in self._parts if part[1] <= cutoff]
+            removed = 0
+            for _, _, table in expired:
+                row = conn.execute(
+                    "SELECT row_count FROM message_partitions WHERE name = ?", (table,)
+                ).fetchone()
+                removed += row[0] if row else 0
+                conn.execute(f"DROP TABLE IF EXISTS {fts_table(table)}")
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute("DELETE FROM message_partitions WHERE name = ?", (table,))
+            self._parts = self._parts[len(expired):]
+            self._starts = self._starts[len(expired):]
+            return removed
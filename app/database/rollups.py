@@ -0,0 +1,155 @@
+"""
+Rollups por canal e hora (mensagens, chatters únicos, pontos, raids)
+Mantidos incrementalmente por quem grava (MessageCRUD, PointsLedger,
+raids), na mesma transação; os gráficos leem só estas tabelas
+Localização: app/database/rollups.py
+"""
+
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+HOUR = 3600
+DAY = 86400
+# Por quanto tempo os conjuntos de chatters vistos são mantidos: mensagens
+# mais atrasadas que isso ainda contam, mas podem repetir um chatter
+SEEN_RETENTION = 2 * DAY
+
+ROLLUP_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS rollup_hourly (
+           channel_id INTEGER NOT NULL,
+           hour INTEGER NOT NULL,
+           messages INTEGER NOT NULL DEFAULT 0,
+           chatters INTEGER NOT NULL DEFAULT 0,
+           points INTEGER NOT NULL DEFAULT 0,
+           raids INTEGER NOT NULL DEFAULT 0,
+           PRIMARY KEY (channel_id, hour)
+       ) WITHOUT ROWID""",
+    # Chatters únicos por dia não saem da soma das horas
+    """CREATE TABLE IF NOT EXISTS rollup_daily (
+           channel_id INTEGER NOT NULL,
+           day INTEGER NOT NULL,
+           chatters INTEGER NOT NULL DEFAULT 0,
+           PRIMARY KEY (channel_id, day)
+       ) WITHOUT ROWID""",
+    # Quem já foi contado em cada hora/dia recente (período primeiro na
+    # chave: a limpeza por período é um intervalo do índice)
+    """CREATE TABLE IF NOT EXISTS rollup_seen_hourly (
+           period INTEGER NOT NULL,
+           channel_id INTEGER NOT NULL,
+           user_id INTEGER NOT NULL,
+           PRIMARY KEY (period, channel_id, user_id)
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS rollup_seen_daily (
+           period INTEGER NOT NULL,
+           channel_id INTEGER NOT NULL,
+           user_id INTEGER NOT NULL,
+           PRIMARY KEY (period, channel_id, user_id)
+       ) WITHOUT ROWID""",
+]
+
+# chatters soma só quem entrou agora no conjunto visto (INSERT OR IGNORE)
+UPSERT_HOURLY = """INSERT INTO rollup_hourly (channel_id, hour, messages, chatters)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(channel_id, hour) DO UPDATE
+                   SET messages = messages + excluded.messages,
+                       chatters = chatters + excluded.chatters"""
+UPSERT_DAILY = """INSERT INTO rollup_daily (channel_id, day, chatters)
+                  VALUES (?, ?, ?)
+                  ON CONFLICT(channel_id, day) DO UPDATE
+                  SET chatters = chatters + excluded.chatters"""
+INSERT_SEEN = """INSERT OR IGNORE INTO {seen} (period, channel_id, user_id)
+                 VALUES (?, ?, ?)"""
+UPSERT_COUNTERS = """INSERT INTO rollup_hourly (channel_id, hour, points, raids)
+                     VALUES (?, ?, ?, ?)
+                     ON CONFLICT(channel_id, hour) DO UPDATE
+                     SET points = points + excluded.points,
+                         raids = raids + excluded.raids"""
+
+
+def create_tables(conn: sqlite3.Connection):
+    for statement in ROLLUP_SCHEMA:
+        conn.execute(statement)
+
+
+class Rollups:
+    """Atualização incremental dos rollups (chamar dentro da transação)"""
+
+    def __init__(self):
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def record_messages(
+        self, conn: sqlite3.Connection, rows: Iterable[Tuple[int, int, int]]
+    ):
+        """Soma um lote de (channel_id, user_id, epoch) aos rollups
+
+        O custo é proporcional ao lote: chatters recebe só quantas linhas o
+        INSERT OR IGNORE de fato inseriu no conjunto visto do período.
+        """
+        hours: Dict[Tuple[int, int], int] = defaultdict(int)
+        seen_hours: Dict[Tuple[int, int], set] = defaultdict(set)
+        seen_days: Dict[Tuple[int, int], set] = defaultdict(set)
+        for channel_id, user_id, created_at in rows:
+            hour = created_at - created_at % HOUR
+            day = created_at - created_at % DAY
+            hours[(channel_id, hour)] += 1
+            seen_hours[(channel_id, hour)].add(user_id)
+            seen_days[(channel_id, day)].add(user_id)
+        if not hours:
+            return
+
+        new_hourly = self._insert_seen(conn, "rollup_seen_hourly", seen_hours)
+        new_daily = self._insert_seen(conn, "rollup_seen_daily", seen_days)
+        conn.executemany(
+            UPSERT_HOURLY,
+            (
+                (channel_id, hour, count, new_hourly[(channel_id, hour)])
+                for (channel_id, hour), count in hours.items()
+            ),
+        )
+        conn.executemany(
+            UPSERT_DAILY,
+            ((channel_id, day, new) for (channel_id, day), new in new_daily.items()),
+        )
+        self._prune(conn)
+
+    @staticmethod
+    def _insert_seen(
+        conn: sqlite3.Connection, seen: str, groups: Dict[Tuple[int, int], set]
+    ) -> Dict[Tuple[int, int], int]:
+        """Grava os chatters de cada (canal, período); retorna quantos eram novos"""
+        sql = INSERT_SEEN.format(seen=seen)
+        return {
+            (channel_id, period): conn.executemany(
+                sql, ((period, channel_id, user_id) for user_id in users)
+            ).rowcount
+            for (channel_id, period), users in groups.items()
+        }
+
+    def add(
+        self,
+        conn: sqlite3.Connection,
+        channel_id: int,
+        points: int = 0,
+        raids: int = 0,
+        when: Optional[int] = None,
+    ):
+        """Soma pontos concedidos/raids na hora de when (padrão: agora)"""
+        when = int(time.time()) if when is None else when
+        conn.execute(
+            UPSERT_COUNTERS, (channel_id, when - when % HOUR, points, raids)
+        )
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Descarta os conjuntos de chatters antigos (no máximo uma vez por hora)"""
+        now = time.time()
+        with self._lock:
+            if now < self._next_prune:
+                return
+            self._next_prune = now + HOUR
+        cutoff = int(now) - SEEN_RETENTION
+        conn.execute("DELETE FROM rollup_seen_hourly WHERE period < ?", (cutoff,))
+        conn.execute("DELETE FROM rollup_seen_daily WHERE period < ?", (cutoff,))
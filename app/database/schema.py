@@ -0,0 +1,341 @@
+"""
+Migrações versionadas do schema (PRAGMA user_version) e checagem de planos
+create_tables() cria o schema base (versão 0); cada migração leva o banco
+para a versão seguinte dentro de uma transação
+Localização: app/database/schema.py
+"""
+
+import sqlite3
+import time
+from typing import Callable, List, Tuple
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _v1_composite_indexes(conn: sqlite3.Connection):
+    """Índices compostos para ranking e histórico (evitam filesort)"""
+    if "channel" not in _columns(conn, "users"):
+        return  # Banco do antigo BotDataDB: o schema normalizado vem na v2
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_channel_points "
+        "ON users(channel, points DESC)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_channel_messages "
+        "ON users(channel, message_count DESC)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_channel_time "
+        "ON messages(channel, timestamp DESC)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_channel_user_time "
+        "ON messages(channel, username, timestamp DESC)"
+    )
+    # Prefixos dos compostos: só ocupavam espaço e custavam escrita
+    conn.execute("DROP INDEX IF EXISTS idx_users_channel")
+    conn.execute("DROP INDEX IF EXISTS idx_messages_channel")
+
+
+def _v2_normalized_keys(conn: sqlite3.Connection):
+    """Schema normalizado: canais e usuários com chave inteira
+
+    users(username, channel, ...) e messages(username, channel, ...)
+    repetiam os textos em toda linha; agora cada linha de pontos e de
+    mensagem guarda só channel_id/user_id e datas em epoch (INTEGER).
+    As views v_users e v_messages mantêm o formato antigo das consultas.
+    Também converte bancos criados pelo antigo BotDataDB
+    (channels.channel_name, user_points.messages).
+    """
+    legacy_users = "channel" in _columns(conn, "users")
+    legacy_messages = "channel" in _columns(conn, "messages")
+    botdata_layout = "channel_name" in _columns(conn, "channels")
+
+    # Renomear sem reescrever as referências das outras tabelas: elas
+    # devem apontar para as tabelas novas, que herdam os nomes
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    if legacy_users:
+        for index in (
+            "idx_users_username",
+            "idx_users_channel_points",
+            "idx_users_channel_messages",
+        ):
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
+        conn.execute("ALTER TABLE users RENAME TO users_v1")
+    if legacy_messages:
+        conn.execute("DROP INDEX IF EXISTS idx_messages_channel_time")
+        conn.execute("DROP INDEX IF EXISTS idx_messages_channel_user_time")
+        conn.execute("ALTER TABLE messages RENAME TO messages_v1")
+    if botdata_layout:
+        conn.execute("DROP INDEX IF EXISTS idx_user_points_user")
+        conn.execute("DROP INDEX IF EXISTS idx_user_points_channel")
+        conn.execute("ALTER TABLE channels RENAME TO channels_v0")
+        conn.execute("ALTER TABLE user_points RENAME TO user_points_v0")
+    conn.execute("PRAGMA legacy_alter_table = OFF")
+
+    # execute() em vez de executescript(), que faria COMMIT no meio
+    for statement in NORMALIZED_SCHEMA:
+        conn.execute(statement)
+
+    if botdata_layout:
+        conn.execute(
+            """INSERT INTO channels (id, name)
+               SELECT id, channel_name FROM channels_v0"""
+        )
+        conn.execute(
+            """INSERT INTO user_points (channel_id, user_id, points, message_count)
+               SELECT channel_id, user_id, points, messages FROM user_points_v0"""
+        )
+        conn.execute("DROP TABLE user_points_v0")
+        conn.execute("DROP TABLE channels_v0")
+
+    if legacy_users:
+        conn.execute(
+            "INSERT OR IGNORE INTO channels (name) SELECT channel FROM users_v1"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO users (username) SELECT username FROM users_v1"
+        )
+        conn.execute(
+            """INSERT INTO user_points
+                   (id, channel_id, user_id, points, message_count,
+                    created_at, updated_at)
+               SELECT o.id, c.id, u.id, o.points, o.message_count,
+                      CAST(strftime('%s', o.created_at) AS INTEGER),
+                      CAST(strftime('%s', o.updated_at) AS INTEGER)
+               FROM users_v1 o
+               JOIN channels c ON c.name = o.channel
+               JOIN users u ON u.username = o.username"""
+        )
+        conn.execute("DROP TABLE users_v1")
+
+    if legacy_messages:
+        conn.execute(
+            "INSERT OR IGNORE INTO channels (name) SELECT channel FROM messages_v1"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO users (username) SELECT username FROM messages_v1"
+        )
+        conn.execute(
+            """INSERT INTO messages (id, channel_id, user_id, message, created_at)
+               SELECT o.id, c.id, u.id, o.message,
+                      CAST(strftime('%s', o.timestamp) AS INTEGER)
+               FROM messages_v1 o
+               JOIN channels c ON c.name = o.channel
+               JOIN users u ON u.username = o.username"""
+        )
+        conn.execute("DROP TABLE messages_v1")
+
+
+def _v3_message_partitions(conn: sqlite3.Connection):
+    """Move messages para partições por tempo (ver partitions.py)
+
+    A view v_messages deixa de existir: uma UNION ALL de todas as
+    partições teria de ser recriada a cada dia; a leitura é pelo MessageCRUD.
+    """
+    from app.database.partitions import (
+        PARTITION_SECONDS,
+        create_partition,
+        create_registry,
+    )
+
+    create_registry(conn)
+    conn.execute("DROP VIEW IF EXISTS v_messages")
+
+    buckets = conn.execute(
+        "SELECT DISTINCT created_at - created_at % ? FROM messages",
+        (PARTITION_SECONDS,),
+    ).fetchall()
+    for (start,) in buckets:
+        end = start + PARTITION_SECONDS
+        table = create_partition(conn, start, end)
+        cursor = conn.execute(
+            f"""INSERT INTO {table} (id, channel_id, user_id, message, created_at)
+                SELECT id, channel_id, user_id, message, created_at FROM messages
+                WHERE created_at >= ? AND created_at < ?""",
+            (start, end),
+        )
+        conn.execute(
+            "UPDATE message_partitions SET row_count = ? WHERE name = ?",
+            (cursor.rowcount, table),
+        )
+
+    conn.execute(
+        "UPDATE message_sequence SET value = "
+        "(SELECT COALESCE(MAX(id), 0) FROM messages)"
+    )
+    conn.execute("DROP TABLE messages")
+
+
+def _v4_message_search(conn: sqlite3.Connection):
+    """Índice FTS5 nas partições já existentes (as novas já nascem com ele)"""
+    from app.database.partitions import PARTITION_SCHEMA, fts_table
+
+    fts_schema = PARTITION_SCHEMA[-1]
+    for (table,) in conn.execute("SELECT name FROM message_partitions").fetchall():
+        conn.execute(fts_schema.format(table=table))
+        fts = fts_table(table)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _v5_rollups(conn: sqlite3.Connection):
+    """Rollups por canal e hora, preenchidos com o histórico existente"""
+    from app.database.rollups import DAY, HOUR, SEEN_RETENTION, create_tables
+
+    create_tables(conn)
+    recent = int(time.time()) - SEEN_RETENTION
+    for (table,) in conn.execute("SELECT name FROM message_partitions").fetchall():
+        conn.execute(
+            f"""INSERT INTO rollup_hourly (channel_id, hour, messages, chatters)
+                SELECT channel_id, created_at - created_at % {HOUR},
+                       COUNT(*), COUNT(DISTINCT user_id)
+                FROM {table} WHERE true GROUP BY 1, 2
+                ON CONFLICT(channel_id, hour) DO UPDATE
+                SET messages = messages + excluded.messages,
+                    chatters = chatters + excluded.chatters"""
+        )
+        conn.execute(
+            f"""INSERT INTO rollup_daily (channel_id, day, chatters)
+                SELECT channel_id, created_at - created_at % {DAY},
+                       COUNT(DISTINCT user_id)
+                FROM {table} WHERE true GROUP BY 1, 2
+                ON CONFLICT(channel_id, day) DO UPDATE
+                SET chatters = chatters + excluded.chatters"""
+        )
+        # Conjuntos de chatters das horas/dias que ainda recebem mensagens
+        for seen, period in (("hourly", HOUR), ("daily", DAY)):
+            conn.execute(
+                f"""INSERT OR IGNORE INTO rollup_seen_{seen}
+                    SELECT DISTINCT created_at - created_at % {period},
+                           channel_id, user_id
+                    FROM {table} WHERE created_at >= {recent}"""
+            )
+
+
+NORMALIZED_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS channels (
+           id INTEGER PRIMARY KEY,
+           name TEXT NOT NULL UNIQUE,
+           created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+       )""",
+    """CREATE TABLE IF NOT EXISTS users (
+           id INTEGER PRIMARY KEY,
+           username TEXT NOT NULL UNIQUE,
+           display_name TEXT,
+           created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+       )""",
+    # Pontos e mensagens de um usuário em um canal
+    """CREATE TABLE IF NOT EXISTS user_points (
+           id INTEGER PRIMARY KEY,
+           channel_id INTEGER NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+           user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+           points INTEGER NOT NULL DEFAULT 0,
+           message_count INTEGER NOT NULL DEFAULT 0,
+           created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+           updated_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+           UNIQUE (channel_id, user_id)
+       )""",
+    """CREATE TABLE IF NOT EXISTS messages (
+           id INTEGER PRIMARY KEY,
+           channel_id INTEGER NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+           user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+           message TEXT NOT NULL,
+           created_at INTEGER NOT NULL
+       )""",
+    """CREATE TABLE IF NOT EXISTS raids (
+           id INTEGER PRIMARY KEY,
+           channel_id INTEGER NOT NULL REFERENCES channels(id) ON DELETE CASCADE,
+           raider_name TEXT NOT NULL,
+           viewers INTEGER NOT NULL,
+           received_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+       )""",
+    "CREATE INDEX IF NOT EXISTS idx_user_points_channel_points "
+    "ON user_points(channel_id, points DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_user_points_channel_messages "
+    "ON user_points(channel_id, message_count DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_user_points_user ON user_points(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_channel_time "
+    "ON messages(channel_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_channel_user_time "
+    "ON messages(channel_id, user_id, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_raids_channel ON raids(channel_id)",
+    # Formato antigo (username/channel em texto, datas em texto)
+    """CREATE VIEW IF NOT EXISTS v_users AS
+       SELECT p.id, u.username, c.name AS channel, p.points, p.message_count,
+              datetime(p.created_at, 'unixepoch') AS created_at,
+              datetime(p.updated_at, 'unixepoch') AS updated_at,
+              p.channel_id, p.user_id
+       FROM user_points p
+       JOIN channels c ON c.id = p.channel_id
+       JOIN users u ON u.id = p.user_id""",
+    """CREATE VIEW IF NOT EXISTS v_messages AS
+       SELECT m.id, u.username, c.name AS channel, m.message, m.user_id,
+              datetime(m.created_at, 'unixepoch') AS timestamp,
+              m.created_at, m.channel_id
+       FROM messages m
+       JOIN channels c ON c.id = m.channel_id
+       JOIN users u ON u.id = m.user_id""",
+]
+
+
+# (versão, descrição, função) em ordem crescente de versão
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "índices compostos de ranking e histórico", _v1_composite_indexes),
+    (2, "schema normalizado com chaves inteiras", _v2_normalized_keys),
+    (3, "histórico de mensagens particionado por tempo", _v3_message_partitions),
+    (4, "busca de texto (FTS5) no histórico", _v4_message_search),
+    (5, "rollups de analytics por canal e hora", _v5_rollups),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Aplica as migrações pendentes; retorna a versão final"""
+    version = get_version(conn)
+    for target, description, apply in MIGRATIONS:
+        if target <= version:
+            continue
+        print(f"🔧 Migrando banco para a versão {target}: {description}")
+        conn.commit()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = target
+    return version
+
+
+def query_plan(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> List[str]:
+    """Linhas de EXPLAIN QUERY PLAN (coluna detail)"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check_query_plan(
+    conn: sqlite3.Connection, sql: str, params: tuple, index: str
+) -> bool:
+    """True se a query usa o índice esperado e não ordena em B-tree temporária
+
+    Ordenar só o desempate ("RIGHT PART"/"LAST TERM" do ORDER BY) é aceito:
+    a ordem principal e o LIMIT continuam vindo do índice.
+    """
+    plan = query_plan(conn, sql, params)
+    uses_index = any(f"INDEX {index}" in detail for detail in plan)
+    sorts = any(
+        "TEMP B-TREE" in detail
+        and "RIGHT PART" not in detail
+        and "LAST TERM" not in detail
+        for detail in plan
+    )
+    return uses_index and not sorts
@@ -0,0 +1,150 @@
+"""
+Perfis de armazenamento do SQLite (pragmas por conexão) e checkpoint do WAL
+Localização: app/database/storage.py
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+# WAL: leitores não bloqueiam o escritor (e vice-versa); com synchronous
+# NORMAL o fsync só acontece no checkpoint, não a cada commit
+STORAGE_PROFILES: Dict[str, Dict[str, object]] = {
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # Negativo = KiB (64 MB)
+        "busy_timeout": 5000,  # ms
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,  # páginas
+    },
+    # Cada commit com fsync (sobrevive a queda de energia, mais lento)
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+    },
+    # Máquinas pequenas: sem mmap e cache menor
+    "low_memory": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 0,
+        "cache_size": -8 * 1024,
+        "busy_timeout": 5000,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 500,
+    },
+    # Comportamento antigo (rollback journal)
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+}
+
+DB_STORAGE_PROFILE = os.getenv("DB_STORAGE_PROFILE", "balanced")
+# Intervalo (segundos) do checkpoint periódico do WAL (0 = só o automático)
+DB_CHECKPOINT_INTERVAL = float(os.getenv("DB_CHECKPOINT_INTERVAL", "300"))
+# Tamanho do WAL a partir do qual o checkpoint periódico o trunca
+DB_WAL_MAX_BYTES = int(os.getenv("DB_WAL_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def get_profile(name: Optional[str] = None) -> Dict[str, object]:
+    name = name or DB_STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        print(f"⚠️ Perfil de armazenamento desconhecido: {name} (usando balanced)")
+        name = "balanced"
+    return STORAGE_PROFILES[name]
+
+
+def configure_connection(conn: sqlite3.Connection, profile: Optional[str] = None):
+    """Aplica os pragmas do perfil (chamar ao criar a conexão)"""
+    for pragma, value in get_profile(profile).items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def connect(
+    db_path: str, profile: Optional[str] = None, **kwargs
+) -> sqlite3.Connection:
+    """sqlite3.connect + row_factory + pragmas do perfil"""
+    conn = sqlite3.connect(db_path, **kwargs)
+    conn.row_factory = sqlite3.Row
+    configure_connection(conn, profile)
+    return conn
+
+
+def checkpoint(conn: sqlite3.Connection, mode: str = "PASSIVE") -> tuple:
+    """Copia o WAL para o banco; retorna (busy, páginas no WAL, copiadas)"""
+    return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+
+class Checkpointer:
+    """Checkpoint periódico dos bancos em WAL
+
+    O autocheckpoint do SQLite roda no commit e é PASSIVE: com leitores
+    sempre ativos o WAL pode crescer sem limite. Aqui cada banco recebe um
+    checkpoint PASSIVE por intervalo e um TRUNCATE quando o WAL passa de
+    DB_WAL_MAX_BYTES, para devolver o espaço em disco.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, interval: float = DB_CHECKPOINT_INTERVAL):
+        self.interval = interval
+        self.max_wal_bytes = DB_WAL_MAX_BYTES
+        self._paths = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def shared(cls) -> "Checkpointer":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def register(self, db_path: str):
+        """Passa a fazer checkpoint periódico do banco"""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            self._paths.add(os.path.abspath(db_path))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def unregister(self, db_path: str):
+        """Para o checkpoint periódico do banco (ao fechá-lo)"""
+        with self._lock:
+            self._paths.discard(os.path.abspath(db_path))
+
+    def run_once(self):
+        with self._lock:
+            paths = list(self._paths)
+        for path in paths:
+            wal_path = f"{path}-wal"
+            if not os.path.exists(wal_path):
+                continue
+            too_big = os.path.getsize(wal_path) > self.max_wal_bytes
+            mode = "TRUNCATE" if too_big else "PASSIVE"
+            try:
+                conn = connect(path, check_same_thread=False)
+                try:
+                    checkpoint(conn, mode)
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ Erro no checkpoint de {path}: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.run_once()
@@ -4,11 +4,12 @@ Versão corrigida com logs funcionando e mensagens aparecendo
 """
 
 from flask import Flask
-from app.web.socket import socketio
+from flask_socketio import emit, join_room, leave_room
+from app.web.socket import socketio, GLOBAL_ROOM, channel_room
 from app.web.app_state import bot_manager
+from app.web.stats_publisher import StatsPublisher
+from app.web.chat_batcher import ChatBatcher
 from datetime import datetime
-import threading
-import time
 import os
 import secrets
 
@@ -43,13 +44,19 @@ app.register_blueprint(integrations_bp)
 # ----------------------------
 # CALLBACKS DO BOT MANAGER
 # ----------------------------
+# Eventos de um canal (logs do bot, raids) vão só para a sala dele; a global
+# recebe só as visões agregadas (stats, status) e os logs do gerenciador: o
+# custo do envio depende de quem assina, não de todos os clientes
+
+# Chat vai em lotes (chat_batch) por canal, não um frame por mensagem
+chat_batcher = ChatBatcher(socketio)
+
 
 def on_message(channel, username, message, messages, points):
     """Callback quando mensagem é recebida"""
-    socketio.emit(
-        "chat_message",
+    chat_batcher.add(
+        channel,
         {
-            "channel": channel,
             "username": username,
             "message": message,
             "messages": messages,
@@ -57,28 +64,33 @@ def on_message(channel, username, message, messages, points):
             "timestamp": datetime.now().strftime("%H:%M:%S"),
         },
     )
-    
-    # 🆕 Emitir stats atualizadas após cada mensagem
-    emit_stats_update()
 
 
 def on_status_change(channel, status):
-    """Callback quando status muda"""
-    socketio.emit("status_change", {"channel": channel, "status": status})
-    
-    # 🆕 Emitir stats atualizadas após mudança de status
-    emit_stats_update()
+    """Callback quando status muda
+
+    Vai também para a sala global: o cliente só assina o canal depois que
+    ele aparece nos stats, e perderia o "connecting"/"online" do início.
+    Quem está nas duas salas recebe uma vez só.
+    """
+    socketio.emit(
+        "status_change",
+        {"channel": channel, "status": status},
+        to=[GLOBAL_ROOM, channel_room(channel)],
+    )
 
 
-def on_log(level, message):
-    """Callback para logs"""
+def on_log(level, message, channel=None):
+    """Callback para logs (os de um bot vão para a sala do canal)"""
     socketio.emit(
         "log_message",
         {
             "level": level,
             "message": message,
+            "channel": channel,
             "timestamp": datetime.now().strftime("%H:%M:%S"),
         },
+        to=channel_room(channel) if channel else GLOBAL_ROOM,
     )
 
 
@@ -92,11 +104,13 @@ def on_raid(channel, raider, viewers):
             "viewers": viewers,
             "timestamp": datetime.now().strftime("%H:%M:%S"),
         },
+        to=channel_room(channel),
+    )
+    on_log(
+        "event",
+        f"🎉 RAID de {raider} com {viewers} viewers no canal {channel}!",
+        channel,
     )
-    on_log("event", f"🎉 RAID de {raider} com {viewers} viewers no canal {channel}!")
-    
-    # 🆕 Emitir stats atualizadas após raid
-    emit_stats_update()
 
 
 bot_manager.set_callbacks(
@@ -106,12 +120,14 @@ bot_manager.set_callbacks(
     on_raid=on_raid
 )
 
-# 🆕 NOVA FUNÇÃO: Emitir stats via WebSocket
-def emit_stats_update():
-    """Emite stats atualizadas via WebSocket"""
+# Stats: deltas a taxa fixa para todos; snapshot só no connect/resync
+stats_publisher = StatsPublisher(socketio, bot_manager)
+
+
+def emit_stats_snapshot():
+    """Envia o snapshot completo só para o cliente que pediu"""
     try:
-        stats = bot_manager.get_aggregated_stats()
-        socketio.emit("stats_update", stats)
+        emit("stats_update", stats_publisher.snapshot())
     except Exception as e:
         print(f"❌ Erro ao emitir stats: {e}")
 
@@ -123,10 +139,12 @@ def emit_stats_update():
 def handle_connect():
     """Cliente conectou via WebSocket"""
     print(f"✅ Cliente conectado via WebSocket")
-    socketio.emit("connected", {"status": "ok"})
-    
-    # 🆕 Enviar stats imediatamente quando cliente conecta
-    emit_stats_update()
+    # Visões agregadas por padrão; canais são assinados com "subscribe"
+    join_room(GLOBAL_ROOM)
+    emit("connected", {"status": "ok"})
+
+    # Snapshot inicial; depois o cliente aplica os stats_delta
+    emit_stats_snapshot()
 
 
 @socketio.on("disconnect")
@@ -135,10 +153,40 @@ def handle_disconnect():
     print("👋 Cliente desconectou")
 
 
+def _rooms_from(data) -> list:
+    """Salas pedidas em {"channel": "x"} ou {"channels": [...]}; "*" é a global"""
+    if not isinstance(data, dict):
+        return []
+    channels = data.get("channels") or [data.get("channel")]
+    return [
+        GLOBAL_ROOM if channel == "*" else channel_room(channel)
+        for channel in channels
+        if isinstance(channel, str) and channel.strip()
+    ]
+
+
+@socketio.on("subscribe")
+def handle_subscribe(data):
+    """Cliente passa a receber os eventos dos canais informados"""
+    rooms = _rooms_from(data)
+    for room in rooms:
+        join_room(room)
+    return {"status": "ok", "rooms": rooms}
+
+
+@socketio.on("unsubscribe")
+def handle_unsubscribe(data):
+    """Cliente deixa de receber os eventos dos canais informados"""
+    rooms = _rooms_from(data)
+    for room in rooms:
+        leave_room(room)
+    return {"status": "ok", "rooms": rooms}
+
+
 @socketio.on("request_stats")
 def handle_stats_request():
-    """Cliente solicitou estatísticas"""
-    emit_stats_update()
+    """Cliente solicitou estatísticas (ou perdeu um delta e pediu resync)"""
+    emit_stats_snapshot()
 
 
 @socketio.on_error_default
@@ -148,24 +196,12 @@ def default_error_handler(e):
     import traceback
     traceback.print_exc()
 
-# 🆕 THREAD DE BACKGROUND: Emitir stats periodicamente (fallback)
-def background_stats_emitter():
-    """Thread que emite stats a cada 15 segundos como fallback"""
-    while True:
-        try:
-            time.sleep(15)  # A cada 15 segundos
-            emit_stats_update()
-        except Exception as e:
-            print(f"❌ Erro no background stats emitter: {e}")
-
-# 🆕 Iniciar thread de background quando o app rodar
 def start_background_tasks():
-    """Inicia tasks em background"""
-    stats_thread = threading.Thread(target=background_stats_emitter, daemon=True)
-    stats_thread.start()
-    print("✅ Background stats emitter iniciado")
+    """Inicia tasks em background (idempotente: cada thread sobe uma vez)"""
+    stats_publisher.start()
+    chat_batcher.start()
 
 
 # Iniciar background tasks quando o módulo for importado
 # Isso garante que funciona tanto quando rodado diretamente quanto via gunicorn
-start_background_tasks()
\ No newline at end of file
+start_background_tasks()
@@ -2,9 +2,20 @@ from app.core.bot_manager import BotManager
 from app.core.streamer_manager import StreamerManager
 from app.core.token_manager import TokenManager
 from app.integrations.integrations_manager import IntegrationManager
+import atexit
 import json, os
 
-bot_manager = BotManager()
+# BOT_SHARD_PROCESSES > 0 distribui os canais entre processos worker
+shard_processes = int(os.getenv("BOT_SHARD_PROCESSES", "0"))
+if shard_processes > 0:
+    from app.core.shard_manager import ShardedBotManager
+
+    bot_manager = ShardedBotManager(num_shards=shard_processes)
+else:
+    bot_manager = BotManager()
+# Encerra os bots/workers com o processo web: grava os pontos e o chat
+# pendentes e fecha o banco (checkpoint final do WAL)
+atexit.register(bot_manager.shutdown)
 streamer_manager = StreamerManager()
 integration_manager = IntegrationManager()
 
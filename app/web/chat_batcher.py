@@ -0,0 +1,76 @@
+"""
+Agrupamento das mensagens de chat enviadas ao dashboard
+Junta as mensagens de cada canal por uma janela curta (ou até N mensagens)
+e envia um único frame chat_batch para a sala do canal
+"""
+
+import os
+import threading
+from typing import Dict, List
+
+from app.web.socket import channel_room
+
+# Janela (segundos) e tamanho máximo de cada lote
+CHAT_BATCH_WINDOW = float(os.getenv("WEB_CHAT_BATCH_WINDOW", "0.075"))
+CHAT_BATCH_SIZE = int(os.getenv("WEB_CHAT_BATCH_SIZE", "50"))
+
+
+class ChatBatcher:
+    """Acumula mensagens por canal e emite um chat_batch por janela"""
+
+    def __init__(
+        self,
+        socketio,
+        window: float = CHAT_BATCH_WINDOW,
+        max_size: int = CHAT_BATCH_SIZE,
+    ):
+        self.socketio = socketio
+        self.window = window
+        self.max_size = max_size
+        self._pending: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def add(self, channel: str, message: dict):
+        """Enfileira uma mensagem; lote cheio é enviado na hora"""
+        with self._lock:
+            batch = self._pending.setdefault(channel, [])
+            batch.append(message)
+            full = len(batch) >= self.max_size
+            if full:
+                del self._pending[channel]
+        if full:
+            self._emit(channel, batch)
+        else:
+            self._wakeup.set()
+
+    def flush(self):
+        """Envia todos os lotes pendentes"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for channel, batch in pending.items():
+            self._emit(channel, batch)
+
+    def _emit(self, channel: str, batch: List[dict]):
+        try:
+            self.socketio.emit(
+                "chat_batch",
+                {"channel": channel, "messages": batch},
+                to=channel_room(channel),
+            )
+        except Exception as e:
+            print(f"❌ Erro ao emitir lote de chat ({channel}): {e}")
+
+    def _run(self):
+        while True:
+            # Dorme até chegar a primeira mensagem; depois espera a janela
+            self._wakeup.wait()
+            self.socketio.sleep(self.window)
+            self._wakeup.clear()
+            self.flush()
@@ -78,8 +78,8 @@ def send_message():
 
 @api_bp.route("/stats")
 def get_stats():
-    """Retorna estatísticas agregadas"""
-    stats = bot_manager.get_aggregated_stats()
+    """Retorna estatísticas agregadas (com os pontos/mensagens por usuário)"""
+    stats = bot_manager.get_aggregated_stats(include_users=True)
     return jsonify(stats)
 
 
@@ -94,6 +94,75 @@ def get_channel_stats(channel):
         return jsonify({"error": "Canal não encontrado"}), 404
 
 
+@api_bp.route("/leaderboard/<channel>")
+def get_leaderboard(channel):
+    """Retorna o ranking de pontos paginado de um canal"""
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 25, type=int)
+    username = request.args.get("user")
+
+    leaderboard = bot_manager.get_leaderboard(channel, page, per_page, username)
+
+    if leaderboard:
+        return jsonify(leaderboard)
+    else:
+        return jsonify({"error": "Canal não encontrado"}), 404
+
+
+@api_bp.route("/messages/search")
+def search_messages():
+    """Busca de texto no histórico do chat (paginada por cursor)"""
+    text = request.args.get("q", "").strip()
+    if not text:
+        return jsonify({"error": "Texto de busca (q) não especificado"}), 400
+
+    limit = max(1, min(request.args.get("limit", 50, type=int), 100))
+    try:
+        result = bot_manager.db.messages.search(
+            text,
+            channel=request.args.get("channel") or None,
+            # Usernames da Twitch (logins) são gravados em minúsculas
+            username=(request.args.get("user") or "").lower() or None,
+            since=request.args.get("since", type=int),
+            until=request.args.get("until", type=int),
+            limit=limit,
+            cursor=request.args.get("cursor") or None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result["query"] = text
+    return jsonify(result)
+
+
+@api_bp.route("/analytics/<channel>")
+def get_channel_analytics(channel):
+    """Séries por hora/dia do canal (lidas só dos rollups)"""
+    now = int(datetime.now().timestamp())
+    bucket = request.args.get("bucket", "hour")
+    since = request.args.get("since", now - 7 * 86400, type=int)
+    until = request.args.get("until", now + 1, type=int)
+
+    try:
+        series = bot_manager.db.analytics.get_series(channel, since, until, bucket)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(
+        {
+            "channel": channel,
+            "bucket": bucket,
+            "since": since,
+            "until": until,
+            "series": series,
+            "totals": {
+                key: sum(point[key] for point in series)
+                for key in ("messages", "points", "raids")
+            },
+        }
+    )
+
+
 @api_bp.route("/streamers", methods=["GET"])
 def get_streamers():
     """Lista todos os streamers"""
@@ -9,4 +9,13 @@ socketio = SocketIO(
     logger=False,
     transports=["websocket", "polling"],
     manage_session=False
-)
\ No newline at end of file
+)
+
+# Salas: cada canal tem a sua (chat, logs do bot, raids); a global recebe
+# as visões agregadas (stats, status dos canais) e os logs do gerenciador
+GLOBAL_ROOM = "global"
+
+
+def channel_room(channel: str) -> str:
+    """Nome da sala Socket.IO de um canal da Twitch"""
+    return f"channel:{channel.lower()}"
@@ -25,6 +25,9 @@ const AppState = {
     total_messages: 0,
     total_points: 0,
   },
+  statsVersion: null, // Versão do último snapshot/delta aplicado
+  statsResyncing: false,
+  subscribedChannels: new Set(), // Salas de canal assinadas no servidor
 };
 
 // ===== INICIALIZAÇÃO =====
@@ -390,6 +393,8 @@ function setupWebSocket() {
   socket.on("disconnect", (reason) => {
     debugLog("❌ Desconectado do servidor:", reason);
     updateStatus("offline");
+    // O servidor esquece as salas; o próximo snapshot assina de novo
+    AppState.subscribedChannels.clear();
     addLogMessage({
       level: "error",
       message: `Desconectado: ${reason}`,
@@ -405,12 +410,13 @@ function setupWebSocket() {
       message: `Reconectado ao servidor (tentativa ${attemptNumber})`,
       timestamp: new Date().toLocaleTimeString(),
     });
-    loadStats();
+    socket.emit("request_stats");
   });
 
-  socket.on("chat_message", (data) => {
-    debugLog("📨 Mensagem recebida:", data);
-    addChatMessage(data);
+  // Lote de mensagens de um canal: um frame e um render por janela
+  socket.on("chat_batch", (batch) => {
+    debugLog(`📨 Lote de ${batch.messages.length} mensagens (${batch.channel})`);
+    addChatBatch(batch);
   });
 
   socket.on("log_message", (data) => {
@@ -422,10 +428,17 @@ function setupWebSocket() {
     handleStatusChange(data);
   });
 
+  // Snapshot completo (connect/resync)
   socket.on("stats_update", (data) => {
+    AppState.statsVersion = data.version ?? null;
+    AppState.statsResyncing = false;
     updateStatsDisplay(data);
   });
 
+  socket.on("stats_delta", (delta) => {
+    applyStatsDelta(delta);
+  });
+
   socket.on("raid_received", (data) => {
     handleRaidNotification(data);
   });
@@ -478,14 +491,10 @@ async function sendMessage() {
   }
 }
 
-function addChatMessage(data) {
-  const container = document.getElementById("chat-messages");
-
-  const placeholder = container.querySelector(".text-gray-500.text-center");
-  if (placeholder) {
-    container.innerHTML = "";
-  }
+// Máximo de mensagens mantidas no DOM do chat
+const MAX_CHAT_MESSAGES = 500;
 
+function createChatElement(data) {
   const { channel, username, message, timestamp, isOwn } = data;
 
   const msgEl = document.createElement("div");
@@ -496,11 +505,38 @@ function addChatMessage(data) {
     <span class="font-bold">${username}:</span>
     <span>${message || ""}</span>
   `;
+  return msgEl;
+}
 
-  container.appendChild(msgEl);
+function appendChatElements(nodes) {
+  const container = document.getElementById("chat-messages");
+
+  const placeholder = container.querySelector(".text-gray-500.text-center");
+  if (placeholder) {
+    container.innerHTML = "";
+  }
+
+  // Um único append e um único scroll por lote
+  container.appendChild(nodes);
+  while (container.childElementCount > MAX_CHAT_MESSAGES) {
+    container.firstElementChild.remove();
+  }
   container.scrollTop = container.scrollHeight;
+}
+
+function addChatMessage(data) {
+  appendChatElements(createChatElement(data));
+  debugLog(`📨 [${data.channel}] ${data.username}: ${data.message}`);
+}
 
-  debugLog(`📨 [${channel}] ${username}: ${message}`);
+function addChatBatch(batch) {
+  const { channel, messages } = batch;
+  const fragment = document.createDocumentFragment();
+  // Só os últimos MAX_CHAT_MESSAGES chegariam a ficar na tela
+  for (const data of messages.slice(-MAX_CHAT_MESSAGES)) {
+    fragment.appendChild(createChatElement({ channel, ...data }));
+  }
+  appendChatElements(fragment);
 }
 
 // ===== STATS =====
@@ -515,6 +551,36 @@ async function loadStats() {
   }
 }
 
+function applyStatsDelta(delta) {
+  // Perdeu um delta (ou ainda não tem snapshot): pede o estado completo
+  if (
+    AppState.statsVersion === null ||
+    delta.version !== AppState.statsVersion + 1
+  ) {
+    if (!AppState.statsResyncing && delta.version > (AppState.statsVersion ?? -1)) {
+      debugLog("🔄 Stats fora de sequência, pedindo resync");
+      AppState.statsResyncing = true;
+      socket.emit("request_stats");
+    }
+    return;
+  }
+  AppState.statsVersion = delta.version;
+
+  const { users, removed, version, ...summary } = delta;
+  const data = { ...AppState.stats, ...summary };
+  if (data.points && data.messages) {
+    for (const [username, [points, messages]] of Object.entries(users)) {
+      data.points[username] = points;
+      data.messages[username] = messages;
+    }
+    for (const username of removed) {
+      delete data.points[username];
+      delete data.messages[username];
+    }
+  }
+  updateStatsDisplay(data);
+}
+
 function updateStatsDisplay(data) {
   AppState.stats = data;
 
@@ -533,6 +599,7 @@ function updateStatsDisplay(data) {
   }
 
   updateChannelSelect(data.connected_channels);
+  syncChannelSubscriptions(data.connected_channels);
 
   // Atualizar debug console
   const debugStats = document.querySelector("#debug-console .bg-gray-800");
@@ -541,6 +608,21 @@ function updateStatsDisplay(data) {
   }
 }
 
+function syncChannelSubscriptions(connectedChannels) {
+  // O dashboard mostra o chat de todos os canais conectados
+  const wanted = new Set(connectedChannels);
+  const added = [...wanted].filter((ch) => !AppState.subscribedChannels.has(ch));
+  const removed = [...AppState.subscribedChannels].filter((ch) => !wanted.has(ch));
+
+  if (added.length) {
+    socket.emit("subscribe", { channels: added });
+  }
+  if (removed.length) {
+    socket.emit("unsubscribe", { channels: removed });
+  }
+  AppState.subscribedChannels = wanted;
+}
+
 function updateChannelSelect(connectedChannels) {
   const select = document.getElementById("chat-channel");
   const currentValue = select.value;
@@ -953,11 +1035,6 @@ function showToast(message, type = "info") {
   }, 3000);
 }
 
-// ===== AUTO-ATUALIZAÇÃO =====
-
-// Atualizar stats a cada 5 segundos
-setInterval(loadStats, 30000);
-
 // Cleanup ao sair
 window.addEventListener("beforeunload", () => {
   if (AppState.voiceEnabled) {
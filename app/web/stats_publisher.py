@@ -0,0 +1,58 @@
+"""
+Publicação das estatísticas para o dashboard via Socket.IO
+No máximo um delta versionado por intervalo, com só os usuários alterados;
+o snapshot completo só vai para quem conecta ou pede resync
+"""
+
+import os
+import threading
+
+from app.web.socket import GLOBAL_ROOM
+
+# Intervalo mínimo (segundos) entre dois deltas de stats
+STATS_INTERVAL = float(os.getenv("WEB_STATS_INTERVAL", "1"))
+
+
+class StatsPublisher:
+    """Envia stats_delta a taxa fixa, independente do volume do chat"""
+
+    def __init__(self, socketio, bot_manager, interval: float = STATS_INTERVAL):
+        self.socketio = socketio
+        self.bot_manager = bot_manager
+        self.interval = interval
+        self.version = 0
+        self._last = None  # Último estado enviado (sem a lista de usuários)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def snapshot(self) -> dict:
+        """Stats completas com a versão atual (para connect/resync)"""
+        with self._lock:
+            stats = self.bot_manager.get_aggregated_stats(include_users=True)
+            stats["version"] = self.version
+            return stats
+
+    def publish_delta(self):
+        """Envia um delta se algo mudou desde o último envio"""
+        with self._lock:
+            delta = self.bot_manager.get_stats_delta()
+            summary = {k: v for k, v in delta.items() if k not in ("users", "removed")}
+            if not delta["users"] and not delta["removed"] and summary == self._last:
+                return
+            self._last = summary
+            self.version += 1
+            delta["version"] = self.version
+        self.socketio.emit("stats_delta", delta, to=GLOBAL_ROOM)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.publish_delta()
+            except Exception as e:
+                print(f"❌ Erro ao publicar stats: {e}")